@@ -0,0 +1,19 @@
+from mininet.topo import Topo
+
+class BatchTopo(Topo):
+    """Topo described as a sequence of add operations instead of imperative add* calls.
+
+    Subclasses implement describe(), yielding ('switch' | 'node' | 'host', name, opts) and
+    ('link', node1, node2, opts) tuples; build() hands them to add_batch(), which applies
+    them in a single pass, so a batched backend only has to replace add_batch()."""
+
+    def describe(self, **_opts):
+        raise NotImplementedError
+
+    def build(self, *args, **params):
+        self.add_batch(self.describe(*args, **params))
+
+    def add_batch(self, ops):
+        add = {'switch': self.addSwitch, 'node': self.addNode, 'host': self.addHost, 'link': self.addLink}
+        for kind, *names, opts in ops:
+            add[kind](*names, **opts)
\ No newline at end of file
@@ -1,7 +1,9 @@
 import os
+import atexit
+import queue
 import logging
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 
 # Create logs directory if it doesn't exist
 LOGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
@@ -11,6 +13,13 @@ os.makedirs(LOGS_DIR, exist_ok=True)
 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
 LOG_FILE = os.path.join(LOGS_DIR, f'mininet_{timestamp}.log')
 
+class DeferredFormatQueueHandler(QueueHandler):
+    """QueueHandler that enqueues the record as is. The stock prepare() formats every record
+    (message, args, traceback) on the calling thread; here the listener's handlers do it instead."""
+
+    def prepare(self, record):
+        return record
+
 # Configure root logger
 def setup_logging():
     # Create formatters
@@ -33,36 +42,45 @@ def setup_logging():
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(simple_formatter)
 
+    # Callers only enqueue records: formatting (%-args, timestamps, tracebacks) and the
+    # file/console writes all happen on the listener thread. Args are formatted when the
+    # listener gets to the record, so callers must not mutate objects they pass as args
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
     # Configure root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(logging.DEBUG)
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
+    root_logger.addHandler(DeferredFormatQueueHandler(log_queue))
 
     # Create a logger for detailed system logs
+    # (propagates to the root queue, which feeds the file handler)
     system_logger = logging.getLogger('system')
     system_logger.setLevel(logging.DEBUG)
-    system_logger.addHandler(file_handler)
 
-    return root_logger, system_logger
+    return root_logger, system_logger, listener
 
 # Create logger instances
-root_logger, system_logger = setup_logging()
+root_logger, system_logger, log_listener = setup_logging()
+
+# The wrappers forward %-style args so logging only formats messages that pass the level filter
 
-def info(msg):
+def info(msg, *args, **kwargs):
     """User-friendly info message (console only)"""
-    root_logger.info(msg)
+    root_logger.info(msg, *args, **kwargs)
 
-def debug(msg):
+def debug(msg, *args, **kwargs):
     """Detailed debug message (log file only)"""
-    system_logger.debug(msg)
+    system_logger.debug(msg, *args, **kwargs)
 
-def error(msg):
+def error(msg, *args, **kwargs):
     """Error message (both console and log file)"""
-    root_logger.error(msg)
-    system_logger.error(msg)
+    root_logger.error(msg, *args, **kwargs)
+    system_logger.error(msg, *args, **kwargs)
 
-def warning(msg):
+def warning(msg, *args, **kwargs):
     """Warning message (both console and log file)"""
-    root_logger.warning(msg)
-    system_logger.warning(msg) 
\ No newline at end of file
+    root_logger.warning(msg, *args, **kwargs)
+    system_logger.warning(msg, *args, **kwargs) 
\ No newline at end of file
@@ -1,9 +1,11 @@
 import os
-import subprocess
-import time
+import shlex
+import base64
+import functools
 import importlib # For dynamic topology loading
 import argparse
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 
 from mininet.net import Mininet
 from mininet.link import TCLink
@@ -12,7 +14,7 @@ from logging_config import info, debug, error
 
 from qemu_mininet_components import (
     QemuHost, QemuSwitch, LinuxRouter,
-    create_common_hosts_file, BASE_QEMU_IMAGE, MININET_HOSTS_FILE
+    start_all_qemu, stop_all_qemu, wait_for, ROOT_SHELL, BASE_QEMU_IMAGE, MININET_HOSTS_FILE
 )
 from performance_tests import run_performance_tests
 
@@ -30,16 +32,14 @@ def configure_vlan_ports(net, topo_obj):
     router_physical_trunk_intf_name = None
     switch_port_to_router = None
 
-    # Find physical link between s1 and r0
+    # Find physical link between s1 and r0 (in either direction)
+    trunk_pair = frozenset((s1, r0))
     for link in net.links:
-        node1, node2 = link.intf1.node, link.intf2.node
-        if (node1 == s1 and node2 == r0):
-            switch_port_to_router = link.intf1.name
-            router_physical_trunk_intf_name = link.intf2.name
-            break
-        elif (node1 == r0 and node2 == s1):
-            switch_port_to_router = link.intf2.name
-            router_physical_trunk_intf_name = link.intf1.name
+        intf1, intf2 = link.intf1, link.intf2
+        if frozenset((intf1.node, intf2.node)) == trunk_pair:
+            switch_intf, router_intf = (intf1, intf2) if intf1.node is s1 else (intf2, intf1)
+            switch_port_to_router = switch_intf.name
+            router_physical_trunk_intf_name = router_intf.name
             break
     
     if not router_physical_trunk_intf_name or not switch_port_to_router:
@@ -50,128 +50,162 @@ def configure_vlan_ports(net, topo_obj):
     info(f"*** Switch port for trunk to router: {s1.name}-{switch_port_to_router}\n")
 
     # Ensure router's physical trunk interface is UP and has NO IP
-    r0.cmd(f'ip addr flush dev {router_physical_trunk_intf_name}')
-    r0.cmd(f'ip link set {router_physical_trunk_intf_name} up')
+    r0.cmd(f'ip addr flush dev {router_physical_trunk_intf_name}; ip link set {router_physical_trunk_intf_name} up')
     
-    all_vlan_ids_for_trunk = set()
-
-    # First, add all TAP interfaces to OVS bridge
-    for host in net.hosts:
-        if isinstance(host, QemuHost) and host.params.get('bridge_name') == s1.name:
-            tap_if_name = host.tap
-            if tap_if_name:
-                info(f"*** Adding TAP interface {tap_if_name} to OVS bridge {s1.name}\n")
-                # First ensure the TAP interface exists and is up
-                s1.cmd(f'sudo ip link set {tap_if_name} up')
-                # Then add it to OVS bridge
-                s1.cmd(f'sudo ovs-vsctl --may-exist add-port {s1.name} {tap_if_name}')
-                # Wait a moment for OVS to process the port
-                time.sleep(1)
-
-    # Then configure VLAN tags on TAP ports
-    for host in net.hosts:
-        if isinstance(host, QemuHost) and host.params.get('bridge_name') == s1.name:
-            vlan_tag = host.params.get('vlan_access_tag')
-            tap_if_name = host.tap
-            
-            if vlan_tag and tap_if_name:
-                info(f"*** Setting OVS port {tap_if_name} (for {host.name}) on {s1.name} as ACCESS for VLAN {vlan_tag}\n")
-                # First check if port exists
-                port_check = s1.cmd(f'sudo ovs-vsctl list port {tap_if_name}')
-                if "no row" not in port_check:
-                    s1.cmd(f'sudo ovs-vsctl set port {tap_if_name} tag={vlan_tag}')
-                    all_vlan_ids_for_trunk.add(str(vlan_tag))
-                else:
-                    info(f"*** ERROR: Port {tap_if_name} not found in OVS bridge {s1.name}\n")
-            else:
-                info(f"*** WARNING: No VLAN tag or TAP name for QemuHost {host.name} to configure on {s1.name}.\n")
-
-    # Configure trunk port on s1
-    if all_vlan_ids_for_trunk and switch_port_to_router:
-        trunk_vlans_str = ",".join(sorted(list(all_vlan_ids_for_trunk)))
-        info(f"*** Setting switch port {switch_port_to_router} on {s1.name} as TRUNK for VLANs: {trunk_vlans_str}\n")
-        s1.cmd(f'sudo ovs-vsctl set port {switch_port_to_router} trunks={trunk_vlans_str}')
-    elif not all_vlan_ids_for_trunk:
-        info(f"*** No VLANs found from QemuHost params, skipping trunk port setup on {s1.name}.\n")
-        return 
-    elif not switch_port_to_router:
-        info(f"*** Switch port to router not identified, cannot set up trunk on {s1.name}.\n")
+    all_vlan_ids_for_trunk = sorted(topo_obj.trunk_vlans)
+    if not all_vlan_ids_for_trunk:
+        info(f"*** No VLANs defined by the topology, skipping trunk port setup on {s1.name}.\n")
+        return
+
+    # Add every TAP as an access port of its VLAN and set the trunk, all in one ovs-vsctl transaction
+    for vlan_id in all_vlan_ids_for_trunk:
+        info(f"*** VLAN {vlan_id}: ACCESS ports for {', '.join(topo_obj.vlans[vlan_id])} on {s1.name}\n")
+    info(f"*** Setting switch port {switch_port_to_router} on {s1.name} as TRUNK for VLANs: {all_vlan_ids_for_trunk}\n")
+    ovs_out, ovs_rc = ROOT_SHELL.run(shlex.join(['ovs-vsctl'] + topo_obj.ovs_vlan_batch_cmd(s1.name, switch_port_to_router)))
+    if ovs_rc != 0:
+        info(f"*** ERROR: OVS VLAN configuration on {s1.name} failed: {ovs_out.strip()}\n")
         return
 
     # Configure VLAN sub-interfaces on router r0
-    for vlan_id_str in sorted(list(all_vlan_ids_for_trunk)):
-        vlan_id = int(vlan_id_str)
+    for vlan_id in all_vlan_ids_for_trunk:
         # Use a simpler name format for VLAN interfaces
         sub_intf_name = f"vlan{vlan_id}" 
         router_vlan_ip = f"10.0.{vlan_id}.1/24" 
         
         info(f"*** Creating sub-interface {sub_intf_name} on {r0.name} with IP {router_vlan_ip}\n")
-        # Remove any existing interface with this name
-        r0.cmd(f'ip link del {sub_intf_name} 2>/dev/null || true') 
-        # Create VLAN interface
-        r0.cmd(f'ip link add link {router_physical_trunk_intf_name} name {sub_intf_name} type vlan id {vlan_id}')
-        # Configure IP and bring up
-        r0.cmd(f'ip addr add {router_vlan_ip} dev {sub_intf_name}')
-        r0.cmd(f'ip link set {sub_intf_name} up')
-        # Wait a moment for interface to be ready
-        time.sleep(1)
+        # Single shell round-trip: remove any existing interface with this name,
+        # create the VLAN interface, configure its IP and bring it up
+        r0.cmd(" && ".join([
+            f'ip link del {sub_intf_name} 2>/dev/null || true',
+            f'ip link add link {router_physical_trunk_intf_name} name {sub_intf_name} type vlan id {vlan_id}',
+            f'ip addr add {router_vlan_ip} dev {sub_intf_name}',
+            f'ip link set {sub_intf_name} up',
+        ]))
+
+    # Wait for the sub-interfaces to be ready
+    for vlan_id in all_vlan_ids_for_trunk:
+        sub_intf_name = f"vlan{vlan_id}"
+        if not wait_for(lambda: 'UP' in r0.cmd(f'ip -br link show {sub_intf_name}')):
+            info(f"*** WARNING: Sub-interface {sub_intf_name} on {r0.name} is not UP\n")
 
     # Enable IP forwarding on router
     r0.cmd('sysctl net.ipv4.ip_forward=1')
     info('*** VLAN configuration complete\n')
 
-def create_common_hosts_file(nodes_for_hosts_file):
+HOSTS_FILE_HEADER = (
+    "127.0.0.1   localhost\n"
+    "::1     localhost ip6-localhost ip6-loopback\n"
+    "ff02::1 ip6-allnodes\n"
+    "ff02::2 ip6-allrouters\n"
+    "\n"
+)
+
+def create_common_hosts_file(qemu_nodes, router_nodes):
     info('*** Creating common /etc/hosts file for all nodes\n')
-    hosts_content = [
-        "127.0.0.1   localhost",
-        "::1     localhost ip6-localhost ip6-loopback",
-        "ff02::1 ip6-allnodes",
-        "ff02::2 ip6-allrouters",
-        ""
-    ]
-    
-    hosts_content.append("# QEMU VM Data Plane IPs")
-    for node in nodes_for_hosts_file:
-        if isinstance(node, QemuHost) and node.app_ip and node.name:
-            hosts_content.append(f"{node.app_ip}\t{node.name}")
-    
-    hosts_content.append("\n# Router Interface IPs")
-    for node in nodes_for_hosts_file:
-        if isinstance(node, LinuxRouter):
+    qemu_lines = [f"{node.app_ip}\t{node.name}\n" for node in qemu_nodes if node.app_ip and node.name]
+
+    router_lines = []
+    for node in router_nodes:
+        intf_prefix = node.name + '-'
+        first_entry = True
+        for intf_name, intf_obj in node.nameToIntf.items():
+            intf_ip = getattr(intf_obj, 'ip', None)
+            if not intf_ip:
+                continue
             # Add the router's name with its first interface IP
-            for intf_name, intf_obj in node.nameToIntf.items():
-                if getattr(intf_obj, 'ip', None):
-                    hosts_content.append(f"{intf_obj.ip}\t{node.name}")
-                    break
-            # Add all router interfaces
-            for intf_name, intf_obj in node.nameToIntf.items():
-                if getattr(intf_obj, 'ip', None):
-                    # For VLAN interfaces, use a simpler name format
-                    if '.' in intf_name:
-                        vlan_id = intf_name.split('.')[-1]
-                        hostname = f"{node.name}-vlan{vlan_id}"
-                    else:
-                        hostname = f"{node.name}-{intf_name.replace(node.name + '-', '')}"
-                    hosts_content.append(f"{intf_obj.ip}\t{hostname}")
-    
-    hosts_content.append("\n# End of Mininet host entries")
+            if first_entry:
+                router_lines.append(f"{intf_ip}\t{node.name}\n")
+                first_entry = False
+            # For VLAN interfaces, use a simpler name format
+            if '.' in intf_name:
+                hostname = f"{node.name}-vlan{intf_name.rsplit('.', 1)[1]}"
+            else:
+                hostname = f"{node.name}-{intf_name.removeprefix(intf_prefix)}"
+            router_lines.append(f"{intf_ip}\t{hostname}\n")
+
+    hosts_text = ''.join([HOSTS_FILE_HEADER, "# QEMU VM Data Plane IPs\n", *qemu_lines,
+                          "\n# Router Interface IPs\n", *router_lines, "\n# End of Mininet host entries\n"])
     with open(MININET_HOSTS_FILE, 'w') as f:
-        f.write('\n'.join(hosts_content) + '\n')
+        f.write(hosts_text)
     os.chmod(MININET_HOSTS_FILE, 0o644)
-    info(f"*** Created common hosts file at {MININET_HOSTS_FILE}:\n" + "\n".join(hosts_content) + "\n")
+    info(f"*** Created common hosts file at {MININET_HOSTS_FILE}:\n{hosts_text}")
     return MININET_HOSTS_FILE
 
-def run_experiment(topo_class, topo_name="Experiment"):
+def add_multi_router_routes(net, topo_obj):
+    """Add the static routes that let the two LANs of MultiRouterTopo reach each other."""
+    r0 = net.nameToNode.get('r0')
+    r1 = net.nameToNode.get('r1')
+    if r0:
+        # r0 needs route to 10.0.3.0/24 via 10.0.12.2 (r1's transit IP)
+        r0.cmd('ip route add 10.0.3.0/24 via 10.0.12.2 dev r0-r1-eth0')
+        info(f"*** [{r0.name}] Added static route to 10.0.3.0/24 via 10.0.12.2 dev r0-r1-eth0\n")
+    if r1:
+        # r1 needs route to 10.0.1.0/24 via 10.0.12.1 (r0's transit IP)
+        r1.cmd('ip route add 10.0.1.0/24 via 10.0.12.1 dev r1-r0-eth0')
+        info(f"*** [{r1.name}] Added static route to 10.0.1.0/24 via 10.0.12.1 dev r1-r0-eth0\n")
+
+def ping_between(src, dst, description):
+    """Ping dst by name from src if both VMs are booted and log the outcome."""
+    if src and getattr(src, "booted", False) and dst and getattr(dst, "booted", False):
+        info(f"*** Testing {description}\n")
+        res, _, rc = src.pexec(f'ping -c 2 -W 2 {dst.name}') # Ping by name
+        info(f"*** {src.name} ping {dst.name}: {'SUCCESSFUL' if rc == 0 else 'FAILED'}\n{res}\n")
+
+def test_same_lan(net, qemu_hosts):
+    if len(qemu_hosts) >= 2:
+        q_first, q_second = qemu_hosts[0], qemu_hosts[1]
+        ping_between(q_first, q_second, f"{q_first.name} <-> {q_second.name} (same LAN)")
+
+def test_routed_subnets(net, qemu_hosts):
+    ping_between(net.nameToNode.get('q1'), net.nameToNode.get('q3'), "q1 <-> q3 (routed subnets)")
+
+def test_multi_router(net, qemu_hosts):
+    # Test connectivity between LANs through routers
+    q1 = net.nameToNode.get('q1')  # In LAN1
+    q3 = net.nameToNode.get('q3')  # In LAN2
+    if q1 and getattr(q1, "booted", False) and q3 and getattr(q3, "booted", False):
+        ping_between(q1, q3, f"{q1.name} (LAN1) <-> {q3.name} (LAN2) through routers")
+
+        # Test connectivity between routers
+        r0 = net.nameToNode.get('r0')
+        r1 = net.nameToNode.get('r1')
+        if r0 and r1:
+            info(f"*** Testing router connectivity: {r0.name} <-> {r1.name}\n")
+            res, _, rc = r0.pexec(f'ping -c 2 -W 2 10.0.12.2') # Ping r1's transit IP
+            info(f"*** {r0.name} ping {r1.name}: {'SUCCESSFUL' if rc == 0 else 'FAILED'}\n{res}\n")
+
+def test_vlan(net, qemu_hosts):
+    ping_between(net.nameToNode.get('q1'), net.nameToNode.get('q3'), "q1 (VLAN100) <-> q3 (VLAN200) via router")
+
+# Per-topology hooks, keyed on the topology class name
+POST_START_HOOKS = {
+    'MultiRouterTopo': add_multi_router_routes,
+    'VlanTopo': configure_vlan_ports, # OVS port tags, router sub-interfaces
+}
+
+CONNECTIVITY_TESTS = {
+    'BasicLanTopo': test_same_lan,
+    'ScaledLanTopo': test_same_lan,
+    'RoutedSubnetsTopo': test_routed_subnets,
+    'MultiRouterTopo': test_multi_router,
+    'VlanTopo': test_vlan,
+}
+
+@functools.lru_cache(maxsize=None)
+def build_topo(topo_class, **topo_params):
+    """Return topo_class(**topo_params), built once per class and parameters. Mininet only reads
+    the Topo as a blueprint, so repeated runs of the same topology reuse it and skip build()."""
+    return topo_class(**topo_params)
+
+def run_experiment(topo_class, topo_name="Experiment", topo_params=None):
     info(f"*** Starting Experiment: {topo_name} ***\n")
 
-    try:
-        subprocess.check_output(['sudo', 'ovs-vsctl', 'show'], stderr=subprocess.STDOUT)
-        info("*** Open vSwitch is running.\n")
-    except (subprocess.CalledProcessError, FileNotFoundError):
+    if ROOT_SHELL.run('ovs-vsctl show')[1] != 0:
         info("--- ERROR: Open vSwitch is not running or ovs-vsctl is not found. Please start it. ---\n")
         return
+    info("*** Open vSwitch is running.\n")
 
-    topo = topo_class()
+    topo = build_topo(topo_class, **(topo_params or {}))
     net = Mininet(topo=topo, switch=QemuSwitch, controller=None, link=TCLink,
                   autoSetMacs=True, autoStaticArp=False, build=False)
 
@@ -179,41 +213,29 @@ def run_experiment(topo_class, topo_name="Experiment"):
     net.build()
 
     all_qemu_hosts_in_net = [h for h in net.hosts if isinstance(h, QemuHost)]
-    for node in all_qemu_hosts_in_net:
-        node.params['_qemu_hosts'] = all_qemu_hosts_in_net
+    routers_in_net = [h for h in net.hosts if isinstance(h, LinuxRouter)]
+    QemuHost.set_peer_ip_map({h.name: h.app_ip for h in all_qemu_hosts_in_net if h.app_ip})
 
     info('*** Starting network (switches, controllers)\n')
     net.start() # Starts switches, controllers. Does NOT start QemuHosts.
 
     # Configure Routers (IP forwarding, static routes if any)
-    for r_node in net.hosts:
-        if isinstance(r_node, LinuxRouter):
-            info(f"*** Configuring router {r_node.name}\n")
-            # Add static routes on router if defined in topology (e.g., for multi-router)
-            if r_node.name == 'r0' and 'MultiRouterTopo' in str(topo_class):
-                # r0 needs route to 10.0.3.0/24 via 10.0.12.2 (r1's transit IP)
-                r_node.cmd('ip route add 10.0.3.0/24 via 10.0.12.2 dev r0-r1-eth0')
-                info(f"*** [{r_node.name}] Added static route to 10.0.3.0/24 via 10.0.12.2 dev r0-r1-eth0\n")
-            if r_node.name == 'r1' and 'MultiRouterTopo' in str(topo_class):
-                # r1 needs route to 10.0.1.0/24 via 10.0.12.1 (r0's transit IP)
-                r_node.cmd('ip route add 10.0.1.0/24 via 10.0.12.1 dev r1-r0-eth0')
-                info(f"*** [{r_node.name}] Added static route to 10.0.1.0/24 via 10.0.12.1 dev r1-r0-eth0\n")
-
-    # Special configuration for VLANs (OVS port tags, router sub-interfaces)
-    if 'VlanTopo' in str(topo_class): # Check if it's the VLAN topology
-        configure_vlan_ports(net, topo)
+    for r_node in routers_in_net:
+        info(f"*** Configuring router {r_node.name}\n")
+
+    # Topology specific configuration (static routes between routers, VLANs, ...)
+    post_start_hook = POST_START_HOOKS.get(topo_class.__name__)
+    if post_start_hook:
+        post_start_hook(net, topo)
 
     info('*** Starting QEMU hosts...\n')
-    q_hosts_started_successfully = True
-    for q_host in all_qemu_hosts_in_net:
-        bridge_name_for_tap = q_host.params.get('bridge_name', 's1') # Default to s1 if not specified
-        info(f"*** Starting QEMU for {q_host.name} (TAP on {bridge_name_for_tap})...\n")
-        if not q_host.startQemu(ovs_bridge_name=bridge_name_for_tap):
-            info(f"!!! Failed to start QEMU for {q_host.name}. Exiting.\n")
-            q_hosts_started_successfully = False
-            break 
-    
-    if not q_hosts_started_successfully:
+    # VMs are independent and each boot mostly waits on the guest, so boot them all at once
+    failed_q_hosts = start_all_qemu(all_qemu_hosts_in_net)
+    if failed_q_hosts:
+        for q_host in failed_q_hosts:
+            info(f"!!! Failed to start QEMU for {q_host.name}.\n")
+        info("!!! Not all QEMU hosts started. Exiting.\n")
+        stop_all_qemu(all_qemu_hosts_in_net)
         net.stop()
         return
 
@@ -232,46 +254,52 @@ def run_experiment(topo_class, topo_name="Experiment"):
 
             # Add other static routes if defined in topology
             static_routes = q_host.params.get('static_routes', [])
-            for route_info in static_routes:
+            if static_routes:
                 # route_info = {'subnet': '10.0.1.0/24', 'via': '10.0.0.1'}
-                q_host.cmd(f'ip route add {route_info["subnet"]} via {route_info["via"]}')
-                info(f"*** [{q_host.name}] Added static route: {route_info['subnet']} via {route_info['via']}\n")
+                q_host.cmd('; '.join(f'ip route add {route_info["subnet"]} via {route_info["via"]}' for route_info in static_routes))
+                for route_info in static_routes:
+                    info(f"*** [{q_host.name}] Added static route: {route_info['subnet']} via {route_info['via']}\n")
             
-            # Disable GRO/GSO/TSO and set firewall to ACCEPT (common setup)
-            q_host.cmd(f'ip link set {q_host.exp_intf_name} up') # Ensure up
-            q_host.cmd(f'ethtool -K {q_host.exp_intf_name} gro off gso off tso off ufo off')
-            info(f"*** [{q_host.name}] Disabled offloading on {q_host.exp_intf_name}\n")
-            q_host.cmd('iptables -F; iptables -P INPUT ACCEPT; iptables -P FORWARD ACCEPT; iptables -P OUTPUT ACCEPT')
+            # Ensure the interface is up with one queue pair per vCPU and set firewall to ACCEPT (common setup).
+            # GRO/GSO/TSO stay on: the TAP and virtio-net device carry segments through vnet_hdr unsplit
+            q_host.cmd('; '.join([
+                f'ip link set {q_host.exp_intf_name} up',
+                f'ethtool -L {q_host.exp_intf_name} combined {q_host.exp_queues}',
+                'iptables -F; iptables -P INPUT ACCEPT; iptables -P FORWARD ACCEPT; iptables -P OUTPUT ACCEPT',
+            ]))
             info(f"*** [{q_host.name}] Set iptables to ACCEPT on {q_host.name}\n")
         else:
             info(f"*** [{q_host.name}] Not booted, skipping IP/route/firewall configuration.\n")
 
     # Create and distribute /etc/hosts
-    nodes_for_hosts_file = all_qemu_hosts_in_net + [h for h in net.hosts if isinstance(h, LinuxRouter)]
-    hosts_file_path = create_common_hosts_file(nodes_for_hosts_file)
+    hosts_file_path = create_common_hosts_file(all_qemu_hosts_in_net, routers_in_net)
     
     info('*** Updating /etc/hosts in VMs for name resolution\n')
-    for q_host in all_qemu_hosts_in_net:
-        if q_host.booted:
-            # Ensure /etc/hosts exists and is writable in VM, or create it.
-            # QEMU images usually have it.
-            q_host.cmd("touch /etc/hosts && chmod 644 /etc/hosts") # Ensure it exists and is writable by root
-            
-            scp_cmd = (f"sshpass -p '0944' scp -o StrictHostKeyChecking=no "
-                       f"-o UserKnownHostsFile=/dev/null -o LogLevel=ERROR "
-                       f"-P {q_host.ssh_host_port} {hosts_file_path} "
-                       f"root@{q_host.qemu_ip}:/etc/hosts")
-            try:
-                scp_run_result = subprocess.run(scp_cmd, shell=True, check=True, text=True, capture_output=True, timeout=10)
-                info(f"*** [{q_host.name}] Successfully copied hosts file to VM\n")
-            except subprocess.CalledProcessError as e:
-                info(f"*** [{q_host.name}] Failed to copy hosts file. SCP RC: {e.returncode}, Error: {e.stderr.strip()}\n")
-            except subprocess.TimeoutExpired:
-                info(f"*** [{q_host.name}] Timeout copying hosts file via SCP.\n")
-        else:
+    # The file is small and identical for every VM: ship it inline over the already open
+    # SSH session of each host, all hosts at once, instead of one scp handshake per VM.
+    with open(hosts_file_path, 'rb') as f:
+        hosts_b64 = base64.b64encode(f.read()).decode()
+    write_hosts_cmd = f"echo {hosts_b64} | base64 -d > /etc/hosts && chmod 644 /etc/hosts"
+
+    def push_hosts_file(q_host):
+        if not q_host.booted:
             info(f"*** [{q_host.name}] Not booted, skipping /etc/hosts update.\n")
+            return
+        _, err, rc = q_host.cmd(write_hosts_cmd, want_tuple=True)
+        if rc == 0:
+            info(f"*** [{q_host.name}] Successfully copied hosts file to VM\n")
+        else:
+            info(f"*** [{q_host.name}] Failed to copy hosts file. RC: {rc}, Error: {err}\n")
+
+    if all_qemu_hosts_in_net:
+        with ThreadPoolExecutor(max_workers=len(all_qemu_hosts_in_net)) as executor:
+            list(executor.map(push_hosts_file, all_qemu_hosts_in_net))
 
-    time.sleep(2) # Allow network to settle
+    # Allow network to settle: wait until the experimental interface of every VM reports UP
+    booted_hosts = [q_host for q_host in all_qemu_hosts_in_net if q_host.booted]
+    wait_for(lambda: all('UP' in q_host.cmd(f'ip -br link show {q_host.exp_intf_name}').split()
+                         for q_host in booted_hosts),
+             timeout=2.0, interval=0.2)
 
     # Basic connectivity tests (ping gateways)
     info('*** Testing initial connectivity to gateways (if applicable)...\n')
@@ -282,47 +310,9 @@ def run_experiment(topo_class, topo_name="Experiment"):
             info(f"*** {q_host.name} ping to its gateway ({gw_ip}): {'SUCCESSFUL' if rc == 0 else 'FAILED (RC='+str(rc)+')'}\n{ping_gw_result}\n")
 
     # More specific tests based on topology (optional, can be done in CLI)
-    if 'BasicLanTopo' in str(topo_class) or 'ScaledLanTopo' in str(topo_class):
-        if len(all_qemu_hosts_in_net) >= 2:
-            q_first = all_qemu_hosts_in_net[0]
-            q_second = all_qemu_hosts_in_net[1]
-            if q_first and q_first.booted and q_second and q_second.booted:
-                info(f"*** Testing {q_first.name} <-> {q_second.name} (same LAN)\n")
-                res, _, rc = q_first.pexec(f'ping -c 2 -W 2 {q_second.name}') # Ping by name
-                info(f"*** {q_first.name} ping {q_second.name}: {'SUCCESSFUL' if rc == 0 else 'FAILED'}\n{res}\n")
-
-    if 'RoutedSubnetsTopo' in str(topo_class):
-        q1 = net.nameToNode.get('q1')
-        q3 = net.nameToNode.get('q3')
-        if q1 and getattr(q1, "booted", False) and q3 and getattr(q3, "booted", False):
-            info(f"*** Testing {q1.name} <-> {q3.name} (routed subnets)\n")
-            res, _, rc = q1.pexec(f'ping -c 2 -W 2 {q3.name}') # Ping by name
-            info(f"*** {q1.name} ping {q3.name}: {'SUCCESSFUL' if rc == 0 else 'FAILED'}\n{res}\n")
-
-    if 'MultiRouterTopo' in str(topo_class):
-        # Test connectivity between LANs through routers
-        q1 = net.nameToNode.get('q1')  # In LAN1
-        q3 = net.nameToNode.get('q3')  # In LAN2
-        if q1 and getattr(q1, "booted", False) and q3 and getattr(q3, "booted", False):
-            info(f"*** Testing {q1.name} (LAN1) <-> {q3.name} (LAN2) through routers\n")
-            res, _, rc = q1.pexec(f'ping -c 2 -W 2 {q3.name}') # Ping by name
-            info(f"*** {q1.name} ping {q3.name}: {'SUCCESSFUL' if rc == 0 else 'FAILED'}\n{res}\n")
-            
-            # Test connectivity between routers
-            r0 = net.nameToNode.get('r0')
-            r1 = net.nameToNode.get('r1')
-            if r0 and r1:
-                info(f"*** Testing router connectivity: {r0.name} <-> {r1.name}\n")
-                res, _, rc = r0.pexec(f'ping -c 2 -W 2 10.0.12.2') # Ping r1's transit IP
-                info(f"*** {r0.name} ping {r1.name}: {'SUCCESSFUL' if rc == 0 else 'FAILED'}\n{res}\n")
-
-    if 'VlanTopo' in str(topo_class):
-        q1 = net.nameToNode.get('q1')
-        q3 = net.nameToNode.get('q3')
-        if q1 and getattr(q1, "booted", False) and q3 and getattr(q3, "booted", False):
-            info(f"*** Testing {q1.name} (VLAN100) <-> {q3.name} (VLAN200) via router\n")
-            res, _, rc = q1.pexec(f'ping -c 2 -W 2 {q3.name}') # Ping by name
-            info(f"*** {q1.name} ping {q3.name}: {'SUCCESSFUL' if rc == 0 else 'FAILED'}\n{res}\n")
+    connectivity_test = CONNECTIVITY_TESTS.get(topo_class.__name__)
+    if connectivity_test:
+        connectivity_test(net, all_qemu_hosts_in_net)
 
     # Run performance tests (latency & throughput)
     run_performance_tests(net, topo_name=topo_name)
@@ -331,7 +321,17 @@ def run_experiment(topo_class, topo_name="Experiment"):
     CLI(net)
     
     info('*** Stopping network\n')
-    net.stop() # This will call terminate on QemuHosts, which calls stopQemu
+    stop_all_qemu(all_qemu_hosts_in_net)
+    net.stop() # Calls terminate on QemuHosts, which skips the QEMU cleanup already done above
+
+@functools.lru_cache(maxsize=None)
+def resolve_topo(topo_spec):
+    """Return the topology class for '<module_name>.<ClassName>', the module being looked up
+    in the 'topologies' package. Cached so repeated runs of the same topology skip the import."""
+    module_name, class_name = topo_spec.rsplit('.', 1)
+    if not module_name.startswith('topologies.'):
+        module_name = f"topologies.{module_name}"
+    return getattr(importlib.import_module(module_name), class_name)
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Run Mininet experiments with QEMU hosts.")
@@ -339,20 +339,21 @@ if __name__ == '__main__':
         '--topo', type=str, required=True,
         help="Topology to run. Format: <module_name>.<ClassName> (e.g., topology_basic_lan.BasicLanTopo)"
     )
+    parser.add_argument(
+        '--vms', type=int, default=None,
+        help="Number of VMs for topologies that take one (e.g., topology_scaled_lan.ScaledLanTopo, default 5)"
+    )
     args = parser.parse_args()
 
     try:
-        module_name, class_name = args.topo.rsplit('.', 1)
-        if not module_name.startswith('topologies.'):
-            module_name = f"topologies.{module_name}"
-        topo_module = importlib.import_module(module_name)
-        topo_class_to_run = getattr(topo_module, class_name)
-        run_experiment(topo_class_to_run, topo_name=args.topo)
+        topo_class_to_run = resolve_topo(args.topo)
+        topo_params = {'n': args.vms} if args.vms is not None else None
+        run_experiment(topo_class_to_run, topo_name=args.topo, topo_params=topo_params)
     except ImportError as e:
         print(f"Error importing topology module: {e!r}")
         print("Ensure the module exists in the 'topologies' directory and PYTHONPATH is set correctly if needed.")
     except AttributeError as e:
-        print(f"Error: Class {class_name} not found in module {module_name}. Details: {e!r}")
+        print(f"Error: Class for topology {args.topo} not found. Details: {e!r}")
     except Exception as e:
         print(f"An unexpected error occurred in main: {e!r}")
         traceback.print_exc()
\ No newline at end of file
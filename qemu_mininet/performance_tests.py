@@ -1,127 +1,165 @@
 import os
-import time
+import re
 import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from logging_config import info, debug, error
+from qemu_mininet_components import wait_for
+
+# Upper bound on concurrent SSH sessions opened towards the VMs during a test sweep
+MAX_PARALLEL_PROBES = 32
+# Concurrent sessions per VM: they share its SSH ControlMaster, and sshd refuses more than
+# MaxSessions (10 by default) per connection; keep a couple free for other commands
+MAX_SESSIONS_PER_HOST = 8
+# Characters of unparsable tool output shown on the console; the full output goes to the debug log
+RAW_OUTPUT_EXCERPT = 500
+
+# Matches the "rtt min/avg/max/mdev = 0.1/0.2/0.3/0.4 ms" summary line of ping
+_PING_RE = re.compile(r'=\s*([\d.]+)/([\d.]+)/([\d.]+)/([\d.]+)\s*ms')
 
 def run_latency_tests(qemu_hosts):
     info("\n=== Latency Tests (ping) ===")
-    results = {}
-    for src in qemu_hosts:
-        results[src.name] = {}
-        for dst in qemu_hosts:
-            if src == dst:
-                continue
-            info(f"Testing latency: {src.name} -> {dst.name}")
-            cmd = f"ping -c 5 -W 1 {dst.name}"
-            out, err, rc = src.pexec(cmd)
-            if rc == 0:
-                # Parse min/avg/max/mdev from ping output
-                try:
-                    lines = out.split('\n')
-                    stats_line = [l for l in lines if 'min/avg/max' in l]
-                    if stats_line:
-                        stats = stats_line[0].split('=')[1].strip().split(' ')[0]
-                        min_rtt, avg_rtt, max_rtt, mdev = map(float, stats.split('/'))
-                        results[src.name][dst.name] = {
-                            'min': min_rtt,
-                            'avg': avg_rtt,
-                            'max': max_rtt,
-                            'mdev': mdev
-                        }
-                        info(f"  min/avg/max/mdev: {min_rtt:.2f}/{avg_rtt:.2f}/{max_rtt:.2f}/{mdev:.2f} ms")
-                    else:
-                        results[src.name][dst.name] = {'error': 'No stats line'}
-                        error(f"  No stats line in ping output.")
-                except Exception as e:
-                    results[src.name][dst.name] = {'error': str(e)}
-                    error(f"  Failed to parse ping output: {e}")
-            else:
-                results[src.name][dst.name] = {'error': f'Ping failed (rc={rc})'}
-                error(f"  Ping failed (rc={rc})")
+    results = {src.name: {} for src in qemu_hosts}
+    # Interleaved by source (every VM's ping to its next peer, then to the one after, ...) so the
+    # pool spreads its sessions over all the VMs instead of queueing on one source's limit
+    n = len(qemu_hosts)
+    tasks = [(qemu_hosts[i], qemu_hosts[(i + k) % n]) for k in range(1, n) for i in range(n)]
+    if not tasks:
+        return results
+    session_slots = {src.name: threading.BoundedSemaphore(MAX_SESSIONS_PER_HOST) for src in qemu_hosts}
+
+    def _ping(task):
+        src, dst = task
+        with session_slots[src.name]:
+            info("Testing latency: %s -> %s", src.name, dst.name)
+            return src.pexec(f"ping -c 5 -W 1 {dst.name}")
+
+    # Each ping is a blocking SSH call, so run them all at once and parse serially afterwards
+    with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_PROBES, len(tasks))) as executor:
+        outputs = dict(zip(tasks, executor.map(_ping, tasks)))
+
+    # Report in source-first order, as before the sweep was interleaved
+    for src, dst in ((src, dst) for src in qemu_hosts for dst in qemu_hosts if src != dst):
+        out, err, rc = outputs[src, dst]
+        info("Latency result: %s -> %s", src.name, dst.name)
+        if rc == 0:
+            # Parse min/avg/max/mdev from ping output
+            try:
+                m = _PING_RE.search(out)
+                if m:
+                    min_rtt, avg_rtt, max_rtt, mdev = map(float, m.groups())
+                    results[src.name][dst.name] = {
+                        'min': min_rtt,
+                        'avg': avg_rtt,
+                        'max': max_rtt,
+                        'mdev': mdev
+                    }
+                    info("  min/avg/max/mdev: %.2f/%.2f/%.2f/%.2f ms", min_rtt, avg_rtt, max_rtt, mdev)
+                else:
+                    results[src.name][dst.name] = {'error': 'No stats line'}
+                    error("  No stats line in ping output.")
+            except Exception as e:
+                results[src.name][dst.name] = {'error': str(e)}
+                error("  Failed to parse ping output: %s", e)
+        else:
+            results[src.name][dst.name] = {'error': f'Ping failed (rc={rc})'}
+            error("  Ping failed (rc=%s)", rc)
     return results
 
+def _ensure_iperf(host):
+    """Return True if iperf is available on host, installing it if needed."""
+    out, err, rc = host.pexec('which iperf')
+    if rc != 0:
+        info(f"Installing iperf on {host.name}")
+        host.cmd('apt-get update && apt-get install -y iperf')
+        # Verify installation
+        out, err, rc = host.pexec('which iperf')
+        if rc != 0:
+            error(f"Failed to install iperf on {host.name}")
+            return False
+    return True
+
+def _start_iperf_server(host):
+    """(Re)start the iperf server on host. Return True once it is running."""
+    # Kill any existing iperf processes and wait for them to exit
+    host.cmd('pkill iperf')
+    wait_for(lambda: host.pexec('pgrep iperf')[2] != 0)
+    host.cmd('iperf -s -D -p 5001')
+    # Wait until the server is running
+    return wait_for(lambda: host.pexec('pgrep iperf')[2] == 0)
+
 def run_throughput_tests(qemu_hosts):
     info("\n=== Throughput Tests (iperf) ===")
-    results = {}
-    for src in qemu_hosts:
-        results[src.name] = {}
+    results = {src.name: {} for src in qemu_hosts}
+    if len(qemu_hosts) < 2:
+        return results
+
+    # Probe (and install if missing) iperf once per host rather than once per pair
+    with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_PROBES, len(qemu_hosts))) as executor:
+        have_iperf = {host.name for host, ok in zip(qemu_hosts, executor.map(_ensure_iperf, qemu_hosts)) if ok}
+
+    # Start one iperf server per host, all at once, and keep them up for the whole sweep
+    iperf_hosts = [host for host in qemu_hosts if host.name in have_iperf]
+    with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_PROBES, len(iperf_hosts) or 1)) as executor:
+        servers_up = {host.name for host, ok in zip(iperf_hosts, executor.map(_start_iperf_server, iperf_hosts)) if ok}
+    for host in iperf_hosts:
+        if host.name not in servers_up:
+            error(f"iperf server failed to start on {host.name}")
+
+    try:
         for dst in qemu_hosts:
-            if src == dst:
+            srcs = [src for src in qemu_hosts if src != dst]
+            info("Testing throughput towards %s from: %s", dst.name, ', '.join(src.name for src in srcs))
+
+            if dst.name not in have_iperf:
+                for src in srcs:
+                    results[src.name][dst.name] = {'error': 'iperf installation failed'}
+                continue
+            if dst.name not in servers_up:
+                for src in srcs:
+                    results[src.name][dst.name] = {'error': 'iperf server failed to start'}
                 continue
-            info(f"Testing throughput: {src.name} -> {dst.name}")
-            
-            # Verify iperf installation on both hosts
-            for host in [src, dst]:
-                out, err, rc = host.pexec('which iperf')
-                if rc != 0:
-                    info(f"Installing iperf on {host.name}")
-                    host.cmd('apt-get update && apt-get install -y iperf')
-                    # Verify installation
-                    out, err, rc = host.pexec('which iperf')
-                    if rc != 0:
-                        error(f"Failed to install iperf on {host.name}")
-                        results[src.name][dst.name] = {'error': 'iperf installation failed'}
-                        continue
-
-            # Kill any existing iperf processes
-            dst.cmd('pkill iperf')
-            time.sleep(1)  # Wait for processes to be killed
-            
-            # Start iperf server with explicit port and interface
-            server_cmd = 'iperf -s -D -p 5001'
-            dst.cmd(server_cmd)
-            time.sleep(2)  # Give server more time to start
-            
-            # Verify server is running
-            out, err, rc = dst.pexec('pgrep iperf')
-            if rc != 0:
-                error(f"iperf server failed to start on {dst.name}")
-                results[src.name][dst.name] = {'error': 'iperf server failed to start'}
+            clients = []
+            for src in srcs:
+                if src.name in have_iperf:
+                    clients.append(src)
+                else:
+                    results[src.name][dst.name] = {'error': 'iperf installation failed'}
+            if not clients:
                 continue
 
-            # Run iperf client without JSON output
-            cmd = f"iperf -c {dst.name} -p 5001 -t 5"
-            out, err, rc = src.pexec(cmd)
-            
-            # Cleanup
-            dst.cmd('pkill iperf')
-            
-            if rc == 0 and out.strip():
-                try:
-                    # Parse the text output to extract bandwidth
-                    lines = out.split('\n')
-                    for line in lines:
-                        if 'bits/sec' in line:
-                            # Extract the bandwidth value
-                            parts = line.split()
-                            bandwidth = float(parts[-2])
-                            unit = parts[-1]
-                            
-                            # Convert to bits per second
-                            if 'Kbits' in unit:
-                                bps = bandwidth * 1000
-                            elif 'Mbits' in unit:
-                                bps = bandwidth * 1000000
-                            elif 'Gbits' in unit:
-                                bps = bandwidth * 1000000000
-                            else:
-                                bps = bandwidth
-                                
-                            results[src.name][dst.name] = {'bps': bps}
-                            info(f"  Throughput: {bandwidth:.2f} {unit}")
-                            break
-                    else:
-                        error(f"  Could not find bandwidth in output")
-                        results[src.name][dst.name] = {'error': 'No bandwidth found in output'}
-                except Exception as e:
-                    error(f"  Failed to parse iperf output: {e}")
-                    error(f"  Raw output: {out}")
-                    results[src.name][dst.name] = {'error': str(e)}
-            else:
-                error(f"  iperf failed (rc={rc})")
-                error(f"  Error output: {err}")
-                results[src.name][dst.name] = {'error': f'iperf failed (rc={rc})'}
+            # Run the clients concurrently; the server accepts them all, so each
+            # reported rate is what that client got while sharing dst's link.
+            cmd = f"iperf -c {dst.name} -p 5001 -t 5 -y C"
+            with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_PROBES, len(clients))) as executor:
+                outputs = list(executor.map(lambda src: src.pexec(cmd), clients))
+
+            for src, (out, err, rc) in zip(clients, outputs):
+                info("Throughput result: %s -> %s", src.name, dst.name)
+                if rc == 0 and out.strip():
+                    try:
+                        # CSV report: the last field of the last line is the bandwidth in bits/sec
+                        bps = float(out.strip().splitlines()[-1].split(',')[-1])
+                        results[src.name][dst.name] = {'bps': bps}
+                        info("  Throughput: %.2f Mbits/sec", bps / 1e6)
+                    except Exception as e:
+                        error("  Failed to parse iperf output: %s", e)
+                        error("  Raw output (first %d chars): %s", RAW_OUTPUT_EXCERPT, out[:RAW_OUTPUT_EXCERPT])
+                        # The full dump can be several KB; only build it when it will reach the log file
+                        if logging.getLogger().isEnabledFor(logging.DEBUG):
+                            debug("  Full raw output: %s", out)
+                        results[src.name][dst.name] = {'error': str(e)}
+                else:
+                    error("  iperf failed (rc=%s)", rc)
+                    error("  Error output: %s", err)
+                    results[src.name][dst.name] = {'error': f'iperf failed (rc={rc})'}
+    finally:
+        # Cleanup
+        if iperf_hosts:
+            with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_PROBES, len(iperf_hosts))) as executor:
+                list(executor.map(lambda host: host.cmd('pkill iperf'), iperf_hosts))
     return results
 
 def run_performance_tests(net, topo_name="Experiment"):
@@ -1,7 +1,16 @@
 #!/usr/bin/env python3
 import os
+import re
+import shlex
+import signal
+import select
+import socket
+import atexit
+import functools
+import threading
 import subprocess
 import time
+from concurrent.futures import ThreadPoolExecutor
 from mininet.topo import Topo
 from mininet.node import Node, Switch, Intf
 from logging_config import info, debug, error
@@ -10,10 +19,168 @@ from mininet.link import TCLink
 # Define the base QEMU image path
 BASE_QEMU_IMAGE = '/home/shogun/Licenta/imagine_qemu/qemu_image.qcow2' # modify this path to your qcow2 image path
 MININET_HOSTS_FILE = '/tmp/mininet_hosts'
+# Private key whose public half is in the base image's /root/.ssh/authorized_keys; without it
+# the VMs are reached with the root password through sshpass
+SSH_KEY_FILE = '/root/.ssh/qemu_mininet_id'
+SSH_PASSWORD = '0944'
+
+def wait_for(condition, timeout=5.0, interval=0.05):
+    """Poll condition() until it returns a truthy value or timeout seconds elapse.
+    Returns True if the condition was met, False on timeout."""
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        if condition():
+            return True
+        time.sleep(interval)
+    return False
+
+class RootShell:
+    """One long-lived 'sudo bash' that runs privileged commands sent over a pipe, so each
+    ip/ovs-vsctl/kill/qemu call does not pay for its own sudo (PAM, policy lookup, exec).
+    Falls back to a one-off 'sudo bash -c' per command when passwordless sudo is not available."""
+    END_MARKER = '__ROOT_SHELL_END__'
+    DEFAULT_TIMEOUT = 60 # Seconds a privileged command may run before the shell is killed and restarted
+
+    def __init__(self):
+        self.proc = None
+        self.unavailable = False
+        self.lock = threading.Lock()
+        self.pending = b'' # Output read past the last complete line
+
+    def _start(self):
+        if self.proc is not None and self.proc.poll() is None:
+            return True
+        if self.unavailable:
+            return False
+        try:
+            self.proc = subprocess.Popen(['sudo', '-n', 'bash'], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         stderr=subprocess.DEVNULL, bufsize=0, start_new_session=True)
+            self.pending = b''
+            self.proc.stdin.write(f"echo {self.END_MARKER}\n".encode())
+            if self._readline(time.monotonic() + 10).strip() == self.END_MARKER:
+                return True
+        except (OSError, EOFError, TimeoutError):
+            pass
+        info("*** WARNING: could not start a persistent root shell, running each privileged command with sudo.\n")
+        self._kill()
+        self.unavailable = True
+        return False
+
+    def _readline(self, deadline):
+        """Next line of the shell's output; TimeoutError past deadline, EOFError if the shell exited."""
+        fd = self.proc.stdout.fileno()
+        while b'\n' not in self.pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                raise TimeoutError
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise EOFError
+            self.pending += chunk
+        line, self.pending = self.pending.split(b'\n', 1)
+        return line.decode(errors='replace') + '\n'
+
+    def _kill(self):
+        """Stop the shell and the command it is running (its own session); the next run() starts a new one."""
+        if self.proc is not None and self.proc.poll() is None:
+            for sig in (signal.SIGTERM, signal.SIGKILL):
+                try:
+                    os.killpg(self.proc.pid, sig)
+                except OSError: # Not root: the group belongs to root, so only sudo itself can be signalled
+                    self.proc.send_signal(sig)
+                try:
+                    self.proc.wait(timeout=2)
+                    break
+                except subprocess.TimeoutExpired:
+                    pass
+        self.proc = None
+
+    def run(self, command, timeout=DEFAULT_TIMEOUT):
+        """Run command (a shell string) as root. Returns (output, returncode); stderr is merged into output.
+        The command runs in a subshell, so 'exit' or a syntax error only ends that; if it is still running
+        after timeout seconds the shell is killed and restarted and returncode is -1."""
+        with self.lock:
+            if self._start():
+                lines = []
+                try:
+                    # eval of a quoted word: the outer shell always sees a complete line, whatever the command's quoting
+                    self.proc.stdin.write(f"( eval {shlex.quote(command)} ) </dev/null 2>&1; "
+                                          f"printf '\\n{self.END_MARKER}%d\\n' $?\n".encode())
+                    deadline = time.monotonic() + timeout
+                    while True:
+                        line = self._readline(deadline)
+                        if line.startswith(self.END_MARKER):
+                            return ''.join(lines)[:-1], int(line[len(self.END_MARKER):])
+                        lines.append(line)
+                except TimeoutError:
+                    reason = f"timed out after {timeout}s"
+                except (OSError, EOFError, ValueError):
+                    reason = "died"
+                error(f"*** Root shell {reason} while running: {command}\n")
+                self._kill()
+                return ''.join(lines), -1
+        return run_privileged(['bash', '-c', command], timeout)
+
+    def close(self):
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=5)
+        self.proc = None
+
+ROOT_SHELL = RootShell()
+atexit.register(ROOT_SHELL.close)
+
+def run_privileged(argv, timeout=RootShell.DEFAULT_TIMEOUT):
+    """Run argv as root in its own process (directly when already root, else through sudo), for
+    long blocking commands that must not hold ROOT_SHELL's lock. Returns (output, returncode), -1 on timeout."""
+    cmd = list(argv) if os.geteuid() == 0 else ['sudo'] + list(argv)
+    try:
+        result = subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                text=True, timeout=timeout)
+    except subprocess.TimeoutExpired as e:
+        error(f"*** Privileged command timed out after {timeout}s: {shlex.join(cmd)}\n")
+        output = e.stdout or ''
+        return output.decode(errors='replace') if isinstance(output, bytes) else output, -1
+    return result.stdout, result.returncode
+
+def ssh_base_cmd():
+    """Start of an ssh command line to a VM: key auth when SSH_KEY_FILE exists, else sshpass with the root password."""
+    if os.path.exists(SSH_KEY_FILE):
+        return ['ssh', '-i', SSH_KEY_FILE, '-o', 'IdentitiesOnly=yes', '-o', 'BatchMode=yes']
+    return ['sshpass', '-p', SSH_PASSWORD, 'ssh']
+
+def ip_batch(commands):
+    """Run several 'ip' commands in a single 'ip -force -batch -' process; errors are not fatal.
+    Returns (output, returncode) like RootShell.run."""
+    batch = '\n'.join(commands)
+    return ROOT_SHELL.run(f"ip -force -batch - <<'__IP_BATCH__'\n{batch}\n__IP_BATCH__")
+
+@functools.lru_cache(maxsize=None)
+def qemu_disk_aio():
+    """Pick QEMU's disk aio backend: io_uring when the running kernel has it, else native Linux AIO."""
+    try:
+        with open('/proc/kallsyms') as f:
+            if any('io_uring_setup' in line for line in f):
+                return 'io_uring'
+    except OSError:
+        pass
+    return 'native'
 
 class QemuHost(Node):
-    def __init__(self, name, overlay, tap, mac, qemu_ip, ssh_host_port, mgmt_mac_suffix, exp_intf_name, app_ip, **kwargs):
+    # Mininet commands that touch interfaces (QemuHost.cmd drops them when aimed at a conceptual qX-ethN intf)
+    INTF_CMD_RE = re.compile(r'(?:ifconfig|ethtool|/sbin/ip\s+(?:addr|link\s+set))')
+    QEMU_NAME_RE = re.compile(r'\bq\d+\b') # QEMU host names (q1, q2, ...) used as ping targets
+    peer_ip_map = {} # QEMU host name -> app IP for every QemuHost in the network, see set_peer_ip_map()
+
+    @classmethod
+    def set_peer_ip_map(cls, mapping):
+        """Set the name -> app IP map used to translate ping targets; called once per network."""
+        cls.peer_ip_map = dict(mapping)
+
+    def __init__(self, name, tap, mac, qemu_ip, ssh_host_port, mgmt_mac_suffix, exp_intf_name, app_ip, vcpus=1, **kwargs):
         self.booted = False
+        self.ctl_sock = None # OpenSSH control socket of the persistent connection to the VM
+        self.ssh_prefix = None # ssh argv up to the remote command, built once per connection mode
         self.qemu_ip = qemu_ip
         self.ssh_host_port = ssh_host_port
         self.app_ip_with_prefix = app_ip
@@ -24,13 +191,15 @@ class QemuHost(Node):
 
         super().__init__(name, inNamespace=False, **kwargs)
 
-        self.overlay = overlay
         self.tap = tap
         self.mac = mac # MAC for the experimental interface (e.g., ens4 inside QEMU)
         self.mgmt_mac_suffix = mgmt_mac_suffix # Suffix for the management interface MAC
         self.exp_intf_name = exp_intf_name # Name of the experimental intf inside QEMU (e.g., ens4)
-        self.proc = None
+        self.vcpus = vcpus # Guest vCPUs (-smp); 1 unless the topology asks for more
+        self.exp_queues = vcpus # virtio-net queue pairs on the experimental NIC, one per guest vCPU
+        self.qemu_pid = None # PID of the daemonized QEMU, read once from pid_file
         self.pid_file = f"/tmp/{name}.pid"
+        self.cleaned_up = False # Set once stopQemu has removed the TAP
 
     # Mininet's Node.IP() calls this. We want it to return the application IP.
     def IP(self, intf=None):
@@ -118,36 +287,33 @@ class QemuHost(Node):
             info(f"*** [{self.name}] QemuHost: VM not booted, ignoring 'ifconfig lo up' during Mininet config().\n")
         return []
 
-    def startQemu(self, ovs_bridge_name='s1'):
-        info(f"*** [{self.name}] Starting QEMU setup...\n")
-        if not os.path.exists(self.overlay):
-            info(f"*** [{self.name}] Creating overlay image {self.overlay} from {BASE_QEMU_IMAGE}\n")
-            try:
-                subprocess.check_call([
-                    'qemu-img', 'create', '-f', 'qcow2', '-F', 'qcow2',
-                    '-b', BASE_QEMU_IMAGE, self.overlay
-                ])
-            except subprocess.CalledProcessError as e:
-                info(f"*** [{self.name}] ERROR creating overlay image: {e}\n")
-                return False
+    def tapSetupCommands(self):
+        """'ip -batch' lines that (re)create this host's TAP and bring it up. The teardown lines fail
+        harmlessly when the TAP doesn't exist yet, so success is judged by the TAP being present afterwards."""
+        return [
+            f'link set {self.tap} down',
+            f'tuntap del dev {self.tap} mode tap',
+            f'tuntap add dev {self.tap} mode tap multi_queue vnet_hdr',
+            f'link set {self.tap} up',
+        ]
 
-        info(f"*** [{self.name}] Setting up TAP interface {self.tap}\n")
-        subprocess.call(['sudo', 'ip', 'link', 'set', self.tap, 'down'], stderr=subprocess.DEVNULL)
-        subprocess.call(['sudo', 'ip', 'tuntap', 'del', 'dev', self.tap, 'mode', 'tap'], stderr=subprocess.DEVNULL)
-        
-        try:
-            subprocess.check_call(['sudo', 'ip', 'tuntap', 'add', 'dev', self.tap, 'mode', 'tap'])
-            subprocess.check_call(['sudo', 'ip', 'link', 'set', self.tap, 'up'])
-        except subprocess.CalledProcessError as e:
-            info(f"*** [{self.name}] ERROR creating TAP interface {self.tap}: {e}\n")
+    def startQemu(self, ovs_bridge_name='s1', tap_ready=False):
+        """Create the TAP (unless tap_ready: start_all_qemu already did it for every host), boot QEMU
+        and wait for SSH. Returns True once the VM is reachable."""
+        info(f"*** [{self.name}] Starting QEMU setup...\n")
+        self.cleaned_up = False
+        if not tap_ready:
+            info(f"*** [{self.name}] Setting up TAP interface {self.tap}\n")
+            ip_batch(self.tapSetupCommands())
+        if not os.path.exists(f'/sys/class/net/{self.tap}'):
+            info(f"*** [{self.name}] ERROR creating TAP interface {self.tap}\n")
             return False
 
         # After creating the TAP:
-        if self.tap and self.params.get('bridge_name'):
+        if self.tap and self.params.get('bridge_name') and not tap_ready:
             bridge = self.params['bridge_name']
             try:
-                subprocess.call(['sudo', 'ip', 'link', 'set', self.tap, 'up'])
-                subprocess.call(['sudo', 'ovs-vsctl', '--may-exist', 'add-port', bridge, self.tap])
+                ROOT_SHELL.run(f'ovs-vsctl --may-exist add-port {bridge} {self.tap}')
                 info(f"*** [{self.name}] TAP {self.tap} added to OVS bridge {bridge} imediat după creare.\n")
             except Exception as e:
                 info(f"*** [{self.name}] EROARE la adăugarea TAP {self.tap} la bridge {bridge}: {e}\n")
@@ -156,36 +322,55 @@ class QemuHost(Node):
         full_mgmt_mac = f"{base_mgmt_mac}{self.mgmt_mac_suffix}"
 
         qemu_cmd = [
-            'sudo', 'qemu-system-x86_64',
+            'qemu-system-x86_64',
             '-daemonize',
             '-m', '512',
-            '-hda', self.overlay,
+            '-smp', str(self.vcpus),
+            # snapshot=on: every VM boots the shared base image and QEMU keeps its writes in a
+            # private temporary overlay that disappears when the VM exits
+            '-drive', f'file={BASE_QEMU_IMAGE},if=virtio,format=qcow2,snapshot=on,aio={qemu_disk_aio()},cache=none,discard=unmap',
             '-netdev', f'user,id=netmgmt,hostfwd=tcp::{self.ssh_host_port}-:22',
             '-device', f'e1000,netdev=netmgmt,mac={full_mgmt_mac}',
-            '-netdev', f'tap,id=netexp,ifname={self.tap},script=no,downscript=no',
-            '-device', f'e1000,netdev=netexp,mac={self.mac}', 
+            # Experimental NIC: virtio-net with the dataplane in the host's vhost-net worker; the vnet header
+            # lets TSO/GSO frames cross the TAP unsegmented. The management NIC stays e1000, it only carries SSH.
+            '-netdev', f'tap,id=netexp,ifname={self.tap},script=no,downscript=no,vhost=on,vnet_hdr=on,queues={self.exp_queues}',
+            '-device', f'virtio-net-pci,netdev=netexp,mac={self.mac},mq=on,vectors={2 * self.exp_queues + 2},'
+                       'csum=on,guest_csum=on,host_tso4=on,host_tso6=on,guest_tso4=on,guest_tso6=on', 
             '-pidfile', self.pid_file
         ]
         info(f"*** [{self.name}] Starting QEMU: {' '.join(qemu_cmd)}\n")
         try:
             if os.path.exists(self.pid_file): os.remove(self.pid_file)
-            self.proc = subprocess.Popen(qemu_cmd)
-            time.sleep(1) 
-            if not os.path.exists(self.pid_file):
-                if self.proc.poll() is not None:
-                    info(f"*** [{self.name}] ERROR: QEMU process terminated unexpectedly after start. Exit code: {self.proc.returncode}\n")
-                    return False
+            self.qemu_pid = None
+            # With -daemonize the launching process only returns once QEMU is initialised (or has failed);
+            # launch outside ROOT_SHELL so parallel boots and other privileged commands don't queue behind it
+            q_out, q_rc = run_privileged(qemu_cmd)
+            if q_rc != 0:
+                info(f"*** [{self.name}] ERROR: QEMU failed to start. Exit code: {q_rc}, output: {q_out.strip()}\n")
+                return False
+            if wait_for(lambda: os.path.exists(self.pid_file), timeout=1.0, interval=0.02):
+                self._readQemuPid()
+            else:
                 info(f"*** [{self.name}] WARNING: QEMU PID file {self.pid_file} not found shortly after start.\n")
         except Exception as e:
             info(f"*** [{self.name}] ERROR starting QEMU: {e}\n")
             return False
 
         info(f"*** [{self.name}] Waiting for SSH on {self.qemu_ip}:{self.ssh_host_port} (up to 60 seconds)...\n")
-        for i in range(30): 
-            time.sleep(2)
+        deadline = time.monotonic() + 60
+        delay = 0.1
+        attempt = 0
+        while time.monotonic() < deadline:
+            # Cheap probe first: the hostfwd port accepts TCP as soon as QEMU runs, so wait
+            # for sshd's banner before paying for a full ssh handshake.
+            if not self._sshBannerReady():
+                time.sleep(delay)
+                delay = min(delay * 2, 1.0)
+                continue
+            attempt += 1
             try:
                 result = subprocess.run(
-                    ['sshpass', '-p', '0944', 'ssh', '-o', 'StrictHostKeyChecking=no',
+                    ssh_base_cmd() + ['-o', 'StrictHostKeyChecking=no',
                      '-o', 'UserKnownHostsFile=/dev/null', '-o', 'LogLevel=ERROR',
                      '-o', 'ConnectTimeout=5', '-p', str(self.ssh_host_port), 
                      f'root@{self.qemu_ip}', 'echo SSH_OK'], 
@@ -194,80 +379,90 @@ class QemuHost(Node):
                 if "SSH_OK" in result.stdout:
                     info(f"*** [{self.name}] SSH connection to {self.qemu_ip}:{self.ssh_host_port} successful!\n")
                     self.booted = True
+                    self.openSshMaster()
                     # Install iperf after successful SSH connection
-                    try:
-                        install_cmd = 'apt-get update && DEBIAN_FRONTEND=noninteractive apt-get install -y iperf'
-                        subprocess.run(
-                            ['sshpass', '-p', '0944', 'ssh', '-o', 'StrictHostKeyChecking=no',
-                             '-o', 'UserKnownHostsFile=/dev/null', '-o', 'LogLevel=ERROR',
-                             '-p', str(self.ssh_host_port), f'root@{self.qemu_ip}', install_cmd],
-                            capture_output=True, text=True, check=True, timeout=60
-                        )
+                    install_cmd = 'apt-get update && DEBIAN_FRONTEND=noninteractive apt-get install -y iperf'
+                    _, s_err, rc = self.cmd(install_cmd, want_tuple=True, timeout=60)
+                    if rc == 0:
                         info(f"*** [{self.name}] Successfully installed iperf\n")
-                    except Exception as e:
-                        info(f"*** [{self.name}] Failed to install iperf: {e}\n")
+                    else:
+                        info(f"*** [{self.name}] Failed to install iperf: RC={rc}, ERR='{s_err}'\n")
                     return True
             except subprocess.CalledProcessError as e:
                 if not any(err_msg in e.stderr for err_msg in ["Connection refused", "Connection reset by peer", "kex_exchange_identification", "Connection timed out during banner exchange"]):
-                    info(f"*** [{self.name}] SSH attempt {i+1}/30 to {self.qemu_ip}:{self.ssh_host_port} failed (CalledProcessError): {e.stderr.strip()}\n")
+                    info(f"*** [{self.name}] SSH attempt {attempt} to {self.qemu_ip}:{self.ssh_host_port} failed (CalledProcessError): {e.stderr.strip()}\n")
             except subprocess.TimeoutExpired:
                 pass 
             except Exception as e:
-                info(f"*** [{self.name}] SSH attempt {i+1}/30 to {self.qemu_ip}:{self.ssh_host_port} failed with unexpected error: {e!r}\n")
+                info(f"*** [{self.name}] SSH attempt {attempt} to {self.qemu_ip}:{self.ssh_host_port} failed with unexpected error: {e!r}\n")
                 if "Permission denied" in str(e): break
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
 
         info(f"*** [{self.name}] FAILED to establish SSH connection to {self.qemu_ip}:{self.ssh_host_port} after multiple attempts.\n")
         # Cleanup QEMU if SSH failed
-        if os.path.exists(self.pid_file):
-            try:
-                with open(self.pid_file, 'r') as f_pid: pid_to_kill = int(f_pid.read().strip())
-                info(f"*** [{self.name}] SSH failed, attempting to kill QEMU process {pid_to_kill}\n")
-                subprocess.call(['sudo', 'kill', str(pid_to_kill)])
+        pid_to_kill = self._readQemuPid()
+        if pid_to_kill:
+            info(f"*** [{self.name}] SSH failed, attempting to kill QEMU process {pid_to_kill}\n")
+            try: self._killQemu(pid_to_kill)
             except Exception as kill_e: info(f"*** [{self.name}] Error killing QEMU process: {kill_e}\n")
-        elif self.proc and self.proc.poll() is None:
-             info(f"*** [{self.name}] SSH failed, terminating QEMU process via Popen.\n")
-             self.proc.terminate(); self.proc.wait(timeout=2) if self.proc.poll() is None else None
-        subprocess.call(['sudo', 'ip', 'link', 'set', self.tap, 'down'], stderr=subprocess.DEVNULL)
-        subprocess.call(['sudo', 'ip', 'tuntap', 'del', 'dev', self.tap, 'mode', 'tap'], stderr=subprocess.DEVNULL)
+        ip_batch([f'link set {self.tap} down', f'tuntap del dev {self.tap} mode tap'])
         return False
 
     def cmd(self, *args, want_tuple=False, **kwargs):
         # Build command_str_for_log
+        conceptual_intf_prefix = f"{self.name}-eth"
         if isinstance(args[0], list):
-            command_str_for_log = ' '.join(args[0])
+            # argv form: quote each argument so the remote shell sees exactly these words
+            argv = [str(arg) for arg in args[0]]
+            command_str_for_log = shlex.join(argv)
+            intf_cmd = argv[0] in ('ifconfig', 'ethtool') or (argv[0] == '/sbin/ip' and argv[1:2] in (['addr'], ['link']))
+            on_conceptual_intf = intf_cmd and any(arg.startswith(conceptual_intf_prefix) for arg in argv)
         else:
+            # Mininet style: the arguments are shell fragments joined with spaces
             command_str_for_log = ' '.join(map(str,args))
+            on_conceptual_intf = conceptual_intf_prefix in command_str_for_log and self.INTF_CMD_RE.search(command_str_for_log)
 
         # Case 1: Intercept Mininet's commands on conceptual interfaces (e.g., qX-eth0)
         # These should not appear if we don't use addLink for QemuHost,
         # but let's keep a safety check.
-        conceptual_intf_pattern = f"{self.name}-eth"
-        if any(cmd_part in command_str_for_log for cmd_part in ["ifconfig", "ethtool", "/sbin/ip addr", "/sbin/ip link set"]) and \
-           conceptual_intf_pattern in command_str_for_log:
-            if conceptual_intf_pattern in command_str_for_log:
-                info(f"*** [{self.name}] QemuHost.cmd: INTERCEPTED Mininet cmd for (non-existent) conceptual intf: '{command_str_for_log}' (Not to VM)\n")
-                if want_tuple: return '', '', 0 
-                return ''
+        if on_conceptual_intf:
+            info(f"*** [{self.name}] QemuHost.cmd: INTERCEPTED Mininet cmd for (non-existent) conceptual intf: '{command_str_for_log}' (Not to VM)\n")
+            if want_tuple: return '', '', 0 
+            return ''
 
         # Case 2: Special commands (ping QEMU hostname, cat /etc/hosts)
         command_to_ssh = command_str_for_log 
-        if command_str_for_log.startswith('ping q') or \
-           (command_str_for_log.startswith('ping -c') and any(p.startswith('q') for p in command_str_for_log.split())):
-            parts = command_str_for_log.split(); translated = False
-            for i, part in enumerate(parts):
-                if part.startswith('q') and any(c.isdigit() for c in part) and '_qemu_hosts' in self.params and any(h.name == part for h in self.params['_qemu_hosts']):
-                    ip_mapping = {h.name: h.app_ip for h in self.params['_qemu_hosts'] if hasattr(h, 'app_ip') and h.app_ip}
-                    if part in ip_mapping: parts[i] = ip_mapping[part]; command_to_ssh = ' '.join(parts); translated = True; break
-            if translated: info(f"*** [{self.name}] QemuHost.cmd: Translated ping '{command_str_for_log}' to '{command_to_ssh}'\n")
+        peer_ip_map = self.peer_ip_map
+        if peer_ip_map and command_str_for_log.startswith('ping '):
+            command_to_ssh = self.QEMU_NAME_RE.sub(lambda m: peer_ip_map.get(m.group(0), m.group(0)), command_str_for_log)
+            if command_to_ssh != command_str_for_log:
+                info(f"*** [{self.name}] QemuHost.cmd: Translated ping '{command_str_for_log}' to '{command_to_ssh}'\n")
         
         # Case 3: Send command to VM via SSH (if booted)
         if self.booted:
             # Only log the command once
-            info(f"*** [{self.name}] QemuHost.cmd (to VM via SSH): '{command_to_ssh}'\n")
-            ssh_cmd_list = ['sshpass', '-p', '0944', 'ssh', '-o', 'StrictHostKeyChecking=no', '-o', 'UserKnownHostsFile=/dev/null', '-o', 'LogLevel=ERROR', '-o', 'ConnectTimeout=10', '-p', str(self.ssh_host_port), f'root@{self.qemu_ip}', command_to_ssh]
+            info("*** [%s] QemuHost.cmd (to VM via SSH): '%s'\n", self.name, command_to_ssh)
+            if self.ssh_prefix is None:
+                self.ssh_prefix = self._sshPrefix()
+            # Background commands (background=True or a trailing '&'): detach them inside the VM so the
+            # SSH session ends right away, and don't wait for it either
+            background = kwargs.get('background', False) or command_to_ssh.rstrip().endswith('&')
+            if background:
+                remote_cmd = command_to_ssh.rstrip().rstrip('&').rstrip()
+                ssh_cmd_list = self.ssh_prefix + [f"nohup sh -c {shlex.quote(remote_cmd)} > /dev/null 2>&1 &"]
+                try:
+                    subprocess.Popen(ssh_cmd_list, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                except OSError as e:
+                    info(f"*** [{self.name}] ERROR starting background SSH cmd '{remote_cmd}': {e!r}\n")
+                    if want_tuple: return '', f'EXCEPTION_QEMU_CMD: {str(e)}', 1
+                    return f'EXCEPTION_QEMU_CMD: {str(e)}'
+                if want_tuple: return '', '', 0
+                return ''
+            ssh_cmd_list = self.ssh_prefix + [command_to_ssh]
             try:
                 result = subprocess.run(ssh_cmd_list, capture_output=True, text=True, check=False, timeout=kwargs.get('timeout', 30))
-                if result.returncode != 0: info(f"*** [{self.name}] SSH CMD='{command_to_ssh}' FAILED. RC={result.returncode}, STDOUT='{result.stdout.strip()}', STDERR='{result.stderr.strip()}'\n")
+                if result.returncode != 0: info("*** [%s] SSH CMD='%s' FAILED. RC=%s, STDOUT='%s', STDERR='%s'\n", self.name, command_to_ssh, result.returncode, result.stdout.strip(), result.stderr.strip())
                 if want_tuple: return result.stdout.strip(), result.stderr.strip(), result.returncode
                 return result.stdout.strip()
             except subprocess.TimeoutExpired:
@@ -286,17 +481,13 @@ class QemuHost(Node):
             return ''
 
     def pexec(self, *args, **kwargs): # Usually called by Mininet for background processes
-        # For QemuHost, most commands are run via SSH and are blocking.
-        # If a true background process in VM is needed, this might need more thought.
-        # For now, treat like a blocking cmd.
-        cmd_list = []
-        if len(args) == 1 and isinstance(args[0], list):
-            cmd_list = args[0]
-        else:
-            cmd_list = list(args)
-        
-        # Remove duplicate logging since cmd() already does it
-        return self.cmd(*cmd_list, want_tuple=True, **kwargs)
+        # For QemuHost, commands are run via SSH and block until they finish, unless they end
+        # with '&' or background=True is passed: those are started in the VM and return ('', '', 0) at once.
+        # pexec takes an argv (as a list or as separate args); a single string is already a command line
+        if len(args) == 1 and isinstance(args[0], str):
+            return self.cmd(args[0], want_tuple=True, **kwargs)
+        argv = args[0] if len(args) == 1 and isinstance(args[0], list) else list(args)
+        return self.cmd(argv, want_tuple=True, **kwargs)
 
     def setIP(self, ip_with_prefix, intf=None, defaultRoute=None):
         if not self.booted:
@@ -320,38 +511,29 @@ class QemuHost(Node):
 
         info(f"*** [{self.name}] Attempting to set IP {ip_with_prefix} on VM interface {target_vm_intf}\n")
         
-        check_intf_cmd = f"/sbin/ip link show {target_vm_intf}"
-        s_out_chk, s_err_chk, rc_chk = self.cmd(check_intf_cmd, want_tuple=True)
-        if rc_chk != 0 or target_vm_intf not in s_out_chk:
-            info(f"*** [{self.name}] ERROR: Interface {target_vm_intf} does not exist in VM. RC={rc_chk}, STDOUT='{s_out_chk}', STDERR='{s_err_chk}'\n")
+        # A single SSH round-trip: check the interface, then (re)assign the address, bring the link up
+        # and verify it, retrying once inside the VM. Exit 2 means the interface is missing.
+        ip_only = ip_with_prefix.split('/')[0]
+        setup_script = (
+            f"/sbin/ip link show {target_vm_intf} > /dev/null || exit 2\n"
+            "for attempt in 1 2; do\n"
+            f"  /sbin/ip addr flush dev {target_vm_intf} || true\n"
+            f"  /sbin/ip addr add {ip_with_prefix} dev {target_vm_intf} && /sbin/ip link set {target_vm_intf} up && "
+            f"/sbin/ip -4 addr show {target_vm_intf} | grep -q 'inet {ip_only}/' && exit 0\n"
+            "  [ $attempt -eq 1 ] && sleep 1\n"
+            "done\n"
+            "exit 1\n"
+        )
+        s_out, s_err, rc = self.cmd(setup_script, want_tuple=True)
+        success_ip_set = rc == 0
+        if rc == 2:
+            info(f"*** [{self.name}] ERROR: Interface {target_vm_intf} does not exist in VM. RC={rc}, STDOUT='{s_out}', STDERR='{s_err}'\n")
             return False
+        if success_ip_set:
+            info(f"*** [{self.name}] IP {ip_with_prefix} successfully set and verified on {target_vm_intf}.\n")
+        else:
+            info(f"*** [{self.name}] Setting IP {ip_with_prefix} on {target_vm_intf} FAILED after 2 attempts. RC={rc}, OUT='{s_out}', ERR='{s_err}'\n")
 
-        commands = [
-            (f"/sbin/ip addr flush dev {target_vm_intf}", "FLUSH_IP"),
-            (f"/sbin/ip addr add {ip_with_prefix} dev {target_vm_intf}", "ADD_IP"),
-            (f"/sbin/ip link set {target_vm_intf} up", "LINK_UP")
-        ]
-        success_ip_set = False
-        for attempt in range(2):
-            all_ok = True
-            for cmd_str, desc in commands:
-                s_out, s_err, rc = self.cmd(cmd_str, want_tuple=True)
-                if rc != 0:
-                    if desc == "FLUSH_IP" and ("Cannot assign requested address" in s_err or "No such process" in s_err or "Cannot find device" in s_err):
-                        info(f"*** [{self.name}] Note: '{desc}' for {target_vm_intf} reported: {s_err} (benign)\n")
-                    else:
-                        info(f"*** [{self.name}] Attempt {attempt+1}, Step '{desc}' FAILED. RC={rc}, ERR='{s_err}'\n")
-                        all_ok = False; break
-            if all_ok:
-                verify_cmd = f"/sbin/ip -4 addr show {target_vm_intf} | grep 'inet {ip_with_prefix.split('/')[0]}/'"
-                s_out_v, _, rc_v = self.cmd(verify_cmd, want_tuple=True)
-                if rc_v == 0 and ip_with_prefix.split('/')[0] in s_out_v:
-                    info(f"*** [{self.name}] IP {ip_with_prefix} successfully set and verified on {target_vm_intf}.\n")
-                    success_ip_set = True; break
-                else:
-                    info(f"*** [{self.name}] IP verify for {ip_with_prefix} on {target_vm_intf} FAILED. Verify output: '{s_out_v}'\n")
-            if not success_ip_set and attempt < 1: time.sleep(1)
-        
         if not success_ip_set:
             info(f"*** [{self.name}] FAILED to set IP {ip_with_prefix} on {target_vm_intf}.\n")
             return False
@@ -361,8 +543,8 @@ class QemuHost(Node):
 
         if defaultRoute:
             info(f"*** [{self.name}] Setting default gateway to {defaultRoute} on {target_vm_intf}\n")
-            self.cmd(f'/sbin/ip route del default || true', want_tuple=True) # Delete any existing default
-            s_out_gw, s_err_gw, rc_gw = self.cmd(f'/sbin/ip route add default via {defaultRoute} dev {target_vm_intf}', want_tuple=True)
+            # Delete any existing default and add the new one in a single round-trip
+            s_out_gw, s_err_gw, rc_gw = self.cmd(f'/sbin/ip route del default 2>/dev/null || true; /sbin/ip route add default via {defaultRoute} dev {target_vm_intf}', want_tuple=True)
             if rc_gw == 0:
                 info(f"*** [{self.name}] Default GW {defaultRoute} set successfully via {target_vm_intf}.\n")
             else:
@@ -373,48 +555,120 @@ class QemuHost(Node):
                 else: info(f"*** [{self.name}] FAILED to set default GW {defaultRoute} (general attempt). RC={rc_gw2}, ERR={s_err_gw2}\n"); return False
         return True
 
+    def _sshBannerReady(self):
+        """Return True once the guest's sshd answers with its 'SSH-' banner on the forwarded port."""
+        try:
+            with socket.create_connection((self.qemu_ip, self.ssh_host_port), timeout=0.25) as sock:
+                sock.settimeout(1.0)
+                return sock.recv(4).startswith(b'SSH-')
+        except OSError:
+            return False
+
+    def openSshMaster(self):
+        """Open a persistent OpenSSH control master to the VM. Commands sent by cmd()
+        afterwards are multiplexed over it instead of opening a new connection each."""
+        ctl_sock = f"/tmp/{self.name}.ctl"
+        if os.path.exists(ctl_sock):
+            try: os.remove(ctl_sock) # Stale socket from a previous run
+            except OSError as e: info(f"*** [{self.name}] Could not remove stale SSH control socket {ctl_sock}: {e}\n")
+        try:
+            subprocess.call(
+                ssh_base_cmd() + ['-M', '-S', ctl_sock, '-fN', '-o', 'ControlPersist=yes',
+                 '-o', 'StrictHostKeyChecking=no', '-o', 'UserKnownHostsFile=/dev/null', '-o', 'LogLevel=ERROR',
+                 '-o', 'ConnectTimeout=10', '-p', str(self.ssh_host_port), f'root@{self.qemu_ip}'],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=15
+            )
+        except subprocess.TimeoutExpired:
+            pass
+        rc = subprocess.call(['ssh', '-S', ctl_sock, '-O', 'check', '-p', str(self.ssh_host_port), f'root@{self.qemu_ip}'],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if rc == 0:
+            self.ctl_sock = ctl_sock
+            self.ssh_prefix = None
+            info(f"*** [{self.name}] Persistent SSH connection open (control socket {ctl_sock})\n")
+            return True
+        info(f"*** [{self.name}] WARNING: could not open persistent SSH connection, using one connection per command.\n")
+        return False
+
+    def _sshPrefix(self):
+        if self.ctl_sock:
+            # Reuse the persistent master connection: no new TCP/SSH handshake or authentication
+            return ['ssh', '-S', self.ctl_sock, '-o', 'BatchMode=yes', '-o', 'LogLevel=ERROR', '-p', str(self.ssh_host_port), f'root@{self.qemu_ip}']
+        return ssh_base_cmd() + ['-o', 'StrictHostKeyChecking=no', '-o', 'UserKnownHostsFile=/dev/null', '-o', 'LogLevel=ERROR', '-o', 'ConnectTimeout=10', '-p', str(self.ssh_host_port), f'root@{self.qemu_ip}']
+
+    def closeSshMaster(self):
+        if not self.ctl_sock:
+            return
+        try:
+            subprocess.call(['ssh', '-S', self.ctl_sock, '-O', 'exit', '-p', str(self.ssh_host_port), f'root@{self.qemu_ip}'],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5)
+        except subprocess.TimeoutExpired:
+            # A hung master or VM must not stall teardown; killing QEMU drops the connection anyway
+            info(f"*** [{self.name}] Timed out closing the SSH master connection, continuing.\n")
+        self.ctl_sock = None
+        self.ssh_prefix = None
+
+    def _readQemuPid(self):
+        """Return the QEMU PID, reading pid_file only the first time. None if it can't be read."""
+        if self.qemu_pid is None:
+            try:
+                with open(self.pid_file, 'r') as f: self.qemu_pid = int(f.read().strip())
+            except (OSError, ValueError) as e:
+                info(f"*** [{self.name}] Error with PID file {self.pid_file}: {e}. May be already stopped or PID invalid.\n")
+        return self.qemu_pid
+
+    @staticmethod
+    def _pidAlive(pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError: # Exists, but owned by root while we aren't
+            return True
+        return True
+
+    def _killQemu(self, pid, grace=3.0):
+        """SIGTERM the QEMU process, then SIGKILL it if it is still alive after grace seconds.
+        Signals it directly when running as root, otherwise through the root shell."""
+        def send(sig):
+            if os.geteuid() == 0:
+                try: os.kill(pid, sig)
+                except ProcessLookupError: pass
+            else:
+                ROOT_SHELL.run(f'kill -{sig.name} {pid}')
+
+        send(signal.SIGTERM)
+        if not wait_for(lambda: not self._pidAlive(pid), timeout=grace, interval=0.1):
+            send(signal.SIGKILL)
+
     def stopQemu(self, cleanup=True):
         info(f"*** [{self.name}] Stopping QEMU...\n")
-        pid_to_kill = None
-        if os.path.exists(self.pid_file):
+        self.closeSshMaster()
+        pid_to_kill = self._readQemuPid() if (self.qemu_pid or os.path.exists(self.pid_file)) else None
+        if pid_to_kill:
             try:
-                with open(self.pid_file, 'r') as f: pid_to_kill = int(f.read().strip())
-                info(f"*** [{self.name}] Killing QEMU process {pid_to_kill} from PID file.\n")
-                subprocess.call(['sudo', 'kill', str(pid_to_kill)])
-                time.sleep(1) # Give a moment for process to die
-                if os.path.exists(f"/proc/{pid_to_kill}"): # Check if still running
-                    subprocess.call(['sudo', 'kill', '-9', str(pid_to_kill)])
-                os.remove(self.pid_file)
-            except (FileNotFoundError, ValueError, TypeError) as e:
-                info(f"*** [{self.name}] Error with PID file {self.pid_file}: {e}. May be already stopped or PID invalid.\n")
+                info(f"*** [{self.name}] Killing QEMU process {pid_to_kill}.\n")
+                self._killQemu(pid_to_kill)
+                if os.path.exists(self.pid_file): os.remove(self.pid_file)
             except Exception as e:
                 info(f"*** [{self.name}] Error stopping QEMU with PID {pid_to_kill}: {e!r}\n")
         
-        if self.proc and self.proc.poll() is None: # If Popen object exists and process is running
-            info(f"*** [{self.name}] Terminating QEMU process via Popen object.\n")
-            self.proc.terminate()
-            try: self.proc.wait(timeout=3)
-            except subprocess.TimeoutExpired: self.proc.kill(); self.proc.wait(timeout=2)
-        
-        self.proc = None
+        self.qemu_pid = None
         self.booted = False
 
         if cleanup:
             bridge_name = self.params.get('bridge_name', None)
             if bridge_name and self.tap:
                 info(f"*** [{self.name}] Cleaning up TAP {self.tap} from bridge {bridge_name}\n")
-                subprocess.call(['sudo', 'ovs-vsctl', '--if-exists', 'del-port', bridge_name, self.tap], stderr=subprocess.DEVNULL)
+                ROOT_SHELL.run(f'ovs-vsctl --if-exists del-port {bridge_name} {self.tap}')
             if self.tap:
-                subprocess.call(['sudo', 'ip', 'link', 'set', self.tap, 'down'], stderr=subprocess.DEVNULL)
-                subprocess.call(['sudo', 'ip', 'tuntap', 'del', 'dev', self.tap, 'mode', 'tap'], stderr=subprocess.DEVNULL)
-            if os.path.exists(self.overlay):
-                info(f"*** [{self.name}] Deleting overlay image {self.overlay}\n")
-                try: os.remove(self.overlay)
-                except OSError as e: info(f"*** [{self.name}] Error deleting overlay {self.overlay}: {e}\n")
+                ip_batch([f'link set {self.tap} down', f'tuntap del dev {self.tap} mode tap'])
+            self.cleaned_up = True
 
     def terminate(self):
         info(f"*** [{self.name}] QemuHost: Terminating...\n")
-        self.stopQemu(cleanup=True) # Ensure full cleanup on terminate
+        if not self.cleaned_up: # May already have been done by stop_all_qemu()
+            self.stopQemu(cleanup=True) # Ensure full cleanup on terminate
         # DelIntf for conceptual Mininet interfaces will be called by Node.terminate()
         super().terminate()
 
@@ -425,55 +679,52 @@ class QemuSwitch(Switch):
     def start(self, controllers):
         info(f"*** [{self.name}] QemuSwitch: Starting OVS bridge {self.name}\n") # Use self.name as bridge name
         # Ensure OVS is running
-        try: subprocess.check_output(['sudo', 'ovs-vsctl', 'show'], stderr=subprocess.STDOUT)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        if ROOT_SHELL.run('ovs-vsctl show')[1] != 0:
             raise Exception("Open vSwitch is not running or ovs-vsctl not found.")
         
-        self.cmd('sudo ovs-vsctl --may-exist add-br', self.name)
-        self.cmd('sudo ip link set', self.name, 'up')
-
-        # First, add all TAP interfaces to OVS bridge
+        # TAP interfaces of the QemuHosts on this bridge
+        ports = []
         if hasattr(self, 'net') and self.net:
             for host in self.net.hosts:
-                if isinstance(host, QemuHost) and host.params.get('bridge_name') == self.name:
-                    tap_if_name = host.tap
-                    if tap_if_name:
-                        info(f"*** [{self.name}] Adding TAP interface {tap_if_name} to OVS bridge {self.name}\n")
-                        # First ensure the TAP interface exists and is up
-                        self.cmd(f'sudo ip link set {tap_if_name} up')
-                        # Then add it to OVS bridge
-                        self.cmd(f'sudo ovs-vsctl --may-exist add-port {self.name} {tap_if_name}')
-                        # Wait a moment for OVS to process the port
-                        time.sleep(1)
-
-        # Then handle any other interfaces (like router links)
+                if isinstance(host, QemuHost) and host.params.get('bridge_name') == self.name and host.tap:
+                    info(f"*** [{self.name}] Adding TAP interface {host.tap} to OVS bridge {self.name}\n")
+                    ports.append(host.tap)
+
+        # Then any other interfaces (like router links)
         for intf in self.intfList():
             if intf.name != self.name and intf.name != 'lo':
                 info(f"*** [{self.name}] QemuSwitch.start: Attaching Mininet interface {intf.name} to bridge.\n")
-                self.attach(intf)
-                try: # Bring up the host-side of the veth pair
-                    subprocess.check_call(['sudo', 'ip', 'link', 'set', intf.name, 'up'])
-                except subprocess.CalledProcessError as e:
-                    info(f"*** [{self.name}] Warning: could not bring up {intf.name}: {e}\n")
+                ports.append(intf.name)
             elif intf.name == 'lo':
                 info(f"*** [{self.name}] QemuSwitch.start: Skipping 'lo' interface.\n")
 
+        # The bridge and all its ports in one ovs-vsctl transaction, then bring everything up in one 'ip' batch
+        ovs_cmd = ['ovs-vsctl', '--may-exist', 'add-br', self.name]
+        for port in ports:
+            ovs_cmd += ['--', '--may-exist', 'add-port', self.name, port]
+        out, rc = ROOT_SHELL.run(shlex.join(ovs_cmd))
+        if rc != 0:
+            info(f"*** [{self.name}] Warning: ovs-vsctl failed to set up bridge {self.name}: {out.strip()}\n")
+        out, rc = ip_batch([f'link set {ifname} up' for ifname in [self.name] + ports])
+        if rc != 0:
+            info(f"*** [{self.name}] Warning: could not bring up every port of {self.name}: {out.strip()}\n")
+
         if controllers:
             pass
         info(f"*** [{self.name}] QemuSwitch: OVS bridge {self.name} started and interfaces processed.\n")
 
     def stop(self, deleteIntfs=True):
         info(f"*** [{self.name}] QemuSwitch: Stopping OVS bridge {self.name}\n")
-        self.cmd('sudo ovs-vsctl --if-exists del-br', self.name)
+        ROOT_SHELL.run(f'ovs-vsctl --if-exists del-br {self.name}')
         super().stop(deleteIntfs)
 
     def attach(self, intf):
         info(f"*** [{self.name}] QemuSwitch.attach: Attaching {intf.name} to {self.name}\n")
-        self.cmd('sudo ovs-vsctl --may-exist add-port', self.name, intf.name)
+        ROOT_SHELL.run(f'ovs-vsctl --may-exist add-port {self.name} {intf.name}')
 
     def detach(self, intf):
         info(f"*** [{self.name}] QemuSwitch.detach: Detaching {intf.name} from {self.name}\n")
-        self.cmd('sudo ovs-vsctl --if-exists del-port', self.name, intf.name)
+        ROOT_SHELL.run(f'ovs-vsctl --if-exists del-port {self.name} {intf.name}')
 
 class LinuxRouter(Node):
     def config(self, **params):
@@ -489,34 +740,37 @@ class LinuxRouter(Node):
         self.cmd('sysctl net.ipv4.ip_forward=0') # Disable forwarding on stop
         super(LinuxRouter, self).terminate()
 
-# Utility function to create common hosts file
-def create_common_hosts_file(nodes_for_hosts_file):
-    info('*** Creating common /etc/hosts file for all nodes\n')
-    hosts_content = [
-        "127.0.0.1   localhost",
-        "::1     localhost ip6-localhost ip6-loopback",
-        "ff02::1 ip6-allnodes",
-        "ff02::2 ip6-allrouters",
-        ""
-    ]
-    
-    hosts_content.append("# QEMU VM Data Plane IPs")
-    for node in nodes_for_hosts_file:
-        if isinstance(node, QemuHost) and node.app_ip and node.name:
-            hosts_content.append(f"{node.app_ip}\t{node.name}")
-    
-    hosts_content.append("\n# Router Interface IPs")
-    for node in nodes_for_hosts_file:
-        if isinstance(node, LinuxRouter):
-            for intf_name, intf_obj in node.nameToIntf.items():
-                if getattr(intf_obj, 'ip', None): # Check if Intf object has an IP
-                     # Sanitize intf_name for hostname: r0-r0-eth1 -> r0-eth1
-                    hostname_for_intf = f"{node.name}-{intf_name.replace(node.name + '-', '')}"
-                    hosts_content.append(f"{intf_obj.ip}\t{hostname_for_intf} {node.name}")
-    
-    hosts_content.append("\n# End of Mininet host entries")
-    with open(MININET_HOSTS_FILE, 'w') as f:
-        f.write('\n'.join(hosts_content) + '\n')
-    os.chmod(MININET_HOSTS_FILE, 0o644)
-    info(f"*** Created common hosts file at {MININET_HOSTS_FILE}:\n" + "\n".join(hosts_content) + "\n")
-    return MININET_HOSTS_FILE
\ No newline at end of file
+def start_all_qemu(qemu_hosts):
+    """Boot all QemuHosts concurrently, each with its TAP on its 'bridge_name' bridge.
+    Every boot is waited for; returns the list of hosts that failed to start."""
+    if not qemu_hosts:
+        return []
+
+    # Create every TAP in one 'ip -batch' and attach them all in one ovs-vsctl transaction,
+    # instead of one round of each per host
+    info(f"*** Setting up TAP interfaces {', '.join(q_host.tap for q_host in qemu_hosts)}\n")
+    ip_batch([line for q_host in qemu_hosts for line in q_host.tapSetupCommands()])
+    ovs_cmd = ['ovs-vsctl']
+    for q_host in qemu_hosts:
+        if q_host.params.get('bridge_name'):
+            ovs_cmd += ['--', '--may-exist', 'add-port', q_host.params['bridge_name'], q_host.tap]
+    if len(ovs_cmd) > 1:
+        out, rc = ROOT_SHELL.run(shlex.join(ovs_cmd))
+        if rc != 0:
+            info(f"*** WARNING: could not add the TAP interfaces to their OVS bridges: {out.strip()}\n")
+
+    def start_one(q_host):
+        bridge_name_for_tap = q_host.params.get('bridge_name', 's1') # Default to s1 if not specified
+        info(f"*** Starting QEMU for {q_host.name} (TAP on {bridge_name_for_tap})...\n")
+        return q_host.startQemu(ovs_bridge_name=bridge_name_for_tap, tap_ready=True)
+
+    with ThreadPoolExecutor(max_workers=len(qemu_hosts)) as executor:
+        started = list(executor.map(start_one, qemu_hosts))
+    return [q_host for q_host, ok in zip(qemu_hosts, started) if not ok]
+
+def stop_all_qemu(qemu_hosts, cleanup=True):
+    """Stop all QemuHosts concurrently (QemuHost.terminate then skips the already done cleanup)."""
+    if not qemu_hosts:
+        return
+    with ThreadPoolExecutor(max_workers=len(qemu_hosts)) as executor:
+        list(executor.map(lambda q_host: q_host.stopQemu(cleanup=cleanup), qemu_hosts))
\ No newline at end of file
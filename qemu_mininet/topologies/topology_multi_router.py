@@ -1,7 +1,44 @@
-from mininet.topo import Topo
-from qemu_mininet_components import QemuHost, LinuxRouter
+from batch_topo import BatchTopo
+from vm_config import VMConfig
 
-class MultiRouterTopo(Topo):
+# VMs per LAN, defined once at import and shared by every build()
+LAN1_VM_CONFIGS = (
+    VMConfig('q1', tap='taplan1vm1',
+             mac='52:54:00:12:01:10', ssh_host_port=2251,
+             mgmt_mac_suffix='11',
+             app_ip='10.0.1.10/24',
+             default_gw='10.0.1.1',
+             bridge_name='s1'),
+    VMConfig('q2', tap='taplan1vm2',
+             mac='52:54:00:12:01:11', ssh_host_port=2252,
+             mgmt_mac_suffix='12',
+             app_ip='10.0.1.11/24',
+             default_gw='10.0.1.1',
+             bridge_name='s1'),
+)
+LAN2_VM_CONFIGS = (
+    VMConfig('q3', tap='taplan2vm1',
+             mac='52:54:00:12:02:10', ssh_host_port=2253,
+             mgmt_mac_suffix='13',
+             app_ip='10.0.3.10/24',
+             default_gw='10.0.3.1',
+             bridge_name='s2'),
+    VMConfig('q4', tap='taplan2vm2',
+             mac='52:54:00:12:02:11', ssh_host_port=2254,
+             mgmt_mac_suffix='14',
+             app_ip='10.0.3.11/24',
+             default_gw='10.0.3.1',
+             bridge_name='s2'),
+)
+
+# Router-side addLink params, shared by every build(). Plain dicts rather than MappingProxyType:
+# Mininet's Link records the port number in them when the network is built
+R0_LAN1_PARAMS = {'ip': '10.0.1.1/24'}
+R1_LAN2_PARAMS = {'ip': '10.0.3.1/24'}
+R0_R1_PARAMS = {'ip': '10.0.12.1/30'}
+R1_R0_PARAMS = {'ip': '10.0.12.2/30'}
+
+class MultiRouterTopo(BatchTopo):
     """
     Topology with two interconnected LANs.
     LAN 1: q1, q2 -- s1 -- r0
@@ -23,80 +60,35 @@ class MultiRouterTopo(Topo):
            r0: 10.0.12.1
            r1: 10.0.12.2
     """
-    def build(self, **_opts):
+    def describe(self, **_opts):
+        from qemu_mininet_components import QemuHost, LinuxRouter
+
         # --- LAN 1 ---
-        s1 = self.addSwitch('s1')
-        r0 = self.addNode('r0', cls=LinuxRouter, ip='10.0.1.1/24') # Conceptual IP for r0
+        yield ('switch', 's1', {})
+        yield ('node', 'r0', {'cls': LinuxRouter, 'ip': '10.0.1.1/24'}) # Conceptual IP for r0
 
         # Connect r0 to s1
-        self.addLink(s1, r0, intfName2='r0-lan1-eth0', params2={'ip': '10.0.1.1/24'})
+        yield ('link', 's1', 'r0', {'intfName2': 'r0-lan1-eth0', 'params2': R0_LAN1_PARAMS})
 
         # VMs for LAN 1
-        lan1_vm_configs = [
-            {
-                'name': 'q1',
-                'overlay': '/tmp/qemu_lan1_vm1_overlay.qcow2', 'tap': 'taplan1vm1',
-                'mac': '52:54:00:12:01:10', 'qemu_ip': '127.0.0.1', 'ssh_host_port': 2251,
-                'mgmt_mac_suffix': '11',
-                'app_ip': '10.0.1.10/24', 'exp_intf_name': 'ens4',
-                'default_gw': '10.0.1.1',
-                'bridge_name': 's1',
-            },
-            {
-                'name': 'q2',
-                'overlay': '/tmp/qemu_lan1_vm2_overlay.qcow2', 'tap': 'taplan1vm2',
-                'mac': '52:54:00:12:01:11', 'qemu_ip': '127.0.0.1', 'ssh_host_port': 2252,
-                'mgmt_mac_suffix': '12',
-                'app_ip': '10.0.1.11/24', 'exp_intf_name': 'ens4',
-                'default_gw': '10.0.1.1',
-                'bridge_name': 's1',
-            }
-        ]
-
-        for config in lan1_vm_configs:
-            host_name = config.pop('name')
-            host_params = config
-            host = self.addHost(host_name, cls=QemuHost, **host_params)
-            # DO NOT add self.addLink for QemuHosts
+        for vm in LAN1_VM_CONFIGS:
+            yield ('host', vm.name, dict(cls=QemuHost, **vm.host_params()))
+            # DO NOT add link ops for QemuHosts
 
         # --- LAN 2 ---
-        s2 = self.addSwitch('s2')
-        r1 = self.addNode('r1', cls=LinuxRouter, ip='10.0.3.1/24') # Conceptual IP for r1
+        yield ('switch', 's2', {})
+        yield ('node', 'r1', {'cls': LinuxRouter, 'ip': '10.0.3.1/24'}) # Conceptual IP for r1
 
         # Connect r1 to s2
-        self.addLink(s2, r1, intfName2='r1-lan2-eth0', params2={'ip': '10.0.3.1/24'})
+        yield ('link', 's2', 'r1', {'intfName2': 'r1-lan2-eth0', 'params2': R1_LAN2_PARAMS})
 
         # VMs for LAN 2
-        lan2_vm_configs = [
-            {
-                'name': 'q3',
-                'overlay': '/tmp/qemu_lan2_vm1_overlay.qcow2', 'tap': 'taplan2vm1',
-                'mac': '52:54:00:12:02:10', 'qemu_ip': '127.0.0.1', 'ssh_host_port': 2253,
-                'mgmt_mac_suffix': '13',
-                'app_ip': '10.0.3.10/24', 'exp_intf_name': 'ens4',
-                'default_gw': '10.0.3.1',
-                'bridge_name': 's2',
-            },
-            {
-                'name': 'q4',
-                'overlay': '/tmp/qemu_lan2_vm2_overlay.qcow2', 'tap': 'taplan2vm2',
-                'mac': '52:54:00:12:02:11', 'qemu_ip': '127.0.0.1', 'ssh_host_port': 2254,
-                'mgmt_mac_suffix': '14',
-                'app_ip': '10.0.3.11/24', 'exp_intf_name': 'ens4',
-                'default_gw': '10.0.3.1',
-                'bridge_name': 's2',
-            }
-        ]
-
-        for config in lan2_vm_configs:
-            host_name = config.pop('name')
-            host_params = config
-            host = self.addHost(host_name, cls=QemuHost, **host_params)
-            # DO NOT add self.addLink for QemuHosts
+        for vm in LAN2_VM_CONFIGS:
+            yield ('host', vm.name, dict(cls=QemuHost, **vm.host_params()))
+            # DO NOT add link ops for QemuHosts
 
         # --- Router Interconnection ---
         # Add direct link between r0 and r1
-        self.addLink(r0, r1,
-                    intfName1='r0-r1-eth0', params1={'ip': '10.0.12.1/30'},
-                    intfName2='r1-r0-eth0', params2={'ip': '10.0.12.2/30'})
+        yield ('link', 'r0', 'r1', {'intfName1': 'r0-r1-eth0', 'params1': R0_R1_PARAMS,
+                                    'intfName2': 'r1-r0-eth0', 'params2': R1_R0_PARAMS})
         
\ No newline at end of file
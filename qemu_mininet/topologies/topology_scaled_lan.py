@@ -1,87 +1,35 @@
-from mininet.topo import Topo
-from qemu_mininet_components import QemuHost
+from batch_topo import BatchTopo
+from vm_config import VMConfig
 
-class ScaledLanTopo(Topo):
+MAX_SCALED_VMS = 240 # Keeps the MAC byte (0x10 + i - 1) and the app IP (10.0.0.(9 + i)) in range
+# Per-index address strings, formatted once at import; entry i - 1 belongs to VM q<i>
+VM_MAC_BYTES = tuple(f'{0x10 + i:02X}' for i in range(MAX_SCALED_VMS))
+VM_MACS = tuple(f'52:54:00:5C:A1:{mac_byte}' for mac_byte in VM_MAC_BYTES)
+VM_APP_IPS = tuple(f'10.0.0.{10 + i}/24' for i in range(MAX_SCALED_VMS))
+
+def make_vm_config(i):
+    """VMConfig of the i-th VM (1-based) of ScaledLanTopo."""
+    return VMConfig(f'q{i}',
+                    tap=f'taps{i}',
+                    mac=VM_MACS[i - 1],
+                    ssh_host_port=2220 + i,
+                    mgmt_mac_suffix=VM_MAC_BYTES[i - 1],
+                    app_ip=VM_APP_IPS[i - 1],
+                    bridge_name='s1')
+
+class ScaledLanTopo(BatchTopo):
     """
-    Scaled LAN Topology: q1..q5 -- s1
+    Scaled LAN Topology: q1..qN -- s1 (N = n, 5 by default)
     All VMs on 10.0.0.x/24 network.
     """
-    def build(self, **_opts):
-        s1 = self.addSwitch('s1')
+    def describe(self, n=5, **_opts):
+        from qemu_mininet_components import QemuHost
 
-        # Define VM parameters statically, similar to basic_lan
-        vm_list = [
-            {
-                'name': 'q1',
-                'overlay': '/tmp/qemu_scale1_overlay.qcow2',
-                'tap': 'taps1',
-                'mac': '52:54:00:5C:A1:10',
-                'qemu_ip': '127.0.0.1',
-                'ssh_host_port': 2221,
-                'mgmt_mac_suffix': '10',
-                'app_ip': '10.0.0.10/24',
-                'exp_intf_name': 'ens4',
-                'bridge_name': 's1',
-            },
-            {
-                'name': 'q2',
-                'overlay': '/tmp/qemu_scale2_overlay.qcow2',
-                'tap': 'taps2',
-                'mac': '52:54:00:5C:A1:11',
-                'qemu_ip': '127.0.0.1',
-                'ssh_host_port': 2222,
-                'mgmt_mac_suffix': '11',
-                'app_ip': '10.0.0.11/24',
-                'exp_intf_name': 'ens4',
-                'bridge_name': 's1',
-            },
-            {
-                'name': 'q3',
-                'overlay': '/tmp/qemu_scale3_overlay.qcow2',
-                'tap': 'taps3',
-                'mac': '52:54:00:5C:A1:12',
-                'qemu_ip': '127.0.0.1',
-                'ssh_host_port': 2223,
-                'mgmt_mac_suffix': '12',
-                'app_ip': '10.0.0.12/24',
-                'exp_intf_name': 'ens4',
-                'bridge_name': 's1',
-            },
-            {
-                'name': 'q4',
-                'overlay': '/tmp/qemu_scale4_overlay.qcow2',
-                'tap': 'taps4',
-                'mac': '52:54:00:5C:A1:13',
-                'qemu_ip': '127.0.0.1',
-                'ssh_host_port': 2224,
-                'mgmt_mac_suffix': '13',
-                'app_ip': '10.0.0.13/24',
-                'exp_intf_name': 'ens4',
-                'bridge_name': 's1',
-            },
-            {
-                'name': 'q5',
-                'overlay': '/tmp/qemu_scale5_overlay.qcow2',
-                'tap': 'taps5',
-                'mac': '52:54:00:5C:A1:14',
-                'qemu_ip': '127.0.0.1',
-                'ssh_host_port': 2225,
-                'mgmt_mac_suffix': '14',
-                'app_ip': '10.0.0.14/24',
-                'exp_intf_name': 'ens4',
-                'bridge_name': 's1',
-            },
-        ]
+        if not 1 <= n <= MAX_SCALED_VMS:
+            raise ValueError(f"ScaledLanTopo supports 1..{MAX_SCALED_VMS} VMs, got {n}")
+        yield ('switch', 's1', {})
 
-        for vm in vm_list:
-            host = self.addHost(vm['name'], cls=QemuHost,
-                                overlay=vm['overlay'],
-                                tap=vm['tap'],
-                                mac=vm['mac'],
-                                qemu_ip=vm['qemu_ip'],
-                                ssh_host_port=vm['ssh_host_port'],
-                                mgmt_mac_suffix=vm['mgmt_mac_suffix'],
-                                app_ip=vm['app_ip'],
-                                exp_intf_name=vm['exp_intf_name'],
-                                bridge_name=vm['bridge_name'])
-            self.addLink(host, s1)
\ No newline at end of file
+        for i in range(1, n + 1):
+            vm = make_vm_config(i)
+            yield ('host', vm.name, dict(cls=QemuHost, **vm.host_params()))
+            yield ('link', vm.name, 's1', {})
\ No newline at end of file
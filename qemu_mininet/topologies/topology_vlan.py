@@ -1,7 +1,48 @@
-from mininet.topo import Topo
-from qemu_mininet_components import QemuHost, LinuxRouter
+from collections import defaultdict
+from types import MappingProxyType
+from batch_topo import BatchTopo
+from vm_config import VMConfig
 
-class VlanTopo(Topo):
+# Read-only static routes, shared by every VM of the same VLAN
+ROUTES_TO_VLAN200 = (MappingProxyType({'subnet': '10.0.200.0/24', 'via': '10.0.100.1'}),)
+ROUTES_TO_VLAN100 = (MappingProxyType({'subnet': '10.0.100.0/24', 'via': '10.0.200.1'}),)
+
+# VMs defined once at import and shared by every build()
+VM_CONFIGS = (
+    # VLAN 100 VMs
+    VMConfig('q1', tap='tapv100q1', # Distinct TAP names
+             mac='52:54:00:AA:01:10', ssh_host_port=2261,
+             mgmt_mac_suffix='A1', app_ip='10.0.100.10/24',
+             default_gw='10.0.100.1', bridge_name='s1', vlan_access_tag=100,
+             static_routes=ROUTES_TO_VLAN200),
+    VMConfig('q2', tap='tapv100q2',
+             mac='52:54:00:AA:01:11', ssh_host_port=2262,
+             mgmt_mac_suffix='A2', app_ip='10.0.100.11/24',
+             default_gw='10.0.100.1', bridge_name='s1', vlan_access_tag=100,
+             static_routes=ROUTES_TO_VLAN200),
+    # VLAN 200 VMs
+    VMConfig('q3', tap='tapv200q3',
+             mac='52:54:00:BB:01:10', ssh_host_port=2263,
+             mgmt_mac_suffix='B1', app_ip='10.0.200.10/24',
+             default_gw='10.0.200.1', bridge_name='s1', vlan_access_tag=200,
+             static_routes=ROUTES_TO_VLAN100),
+    VMConfig('q4', tap='tapv200q4',
+             mac='52:54:00:BB:01:11', ssh_host_port=2264,
+             mgmt_mac_suffix='B2', app_ip='10.0.200.11/24',
+             default_gw='10.0.200.1', bridge_name='s1', vlan_access_tag=200,
+             static_routes=ROUTES_TO_VLAN100),
+)
+
+def vlan_members(vm_configs):
+    """Map each VLAN access tag to the names of the VMs in it, in a single pass."""
+    members = defaultdict(list)
+    for vm in vm_configs:
+        members[vm.vlan_access_tag].append(vm.name)
+    return dict(members)
+
+VLAN_MEMBERS = vlan_members(VM_CONFIGS)
+
+class VlanTopo(BatchTopo):
     """
     VLAN Topology REVISED:
     q1, q2 (VLAN 100, TAP-uri pe s1) -- s1 -- r0 (trunk)
@@ -12,57 +53,40 @@ class VlanTopo(Topo):
     VLAN 100 Subnet: 10.0.100.0/24, Router (r0-phys-trunk.100): 10.0.100.1
     VLAN 200 Subnet: 10.0.200.0/24, Router (r0-phys-trunk.200): 10.0.200.1
     """
-    def build(self, **_opts):
-        s1 = self.addSwitch('s1')
+    def describe(self, **_opts):
+        from qemu_mininet_components import QemuHost, LinuxRouter
+
+        yield ('switch', 's1', {})
         # The router's main IP is conceptual; sub-interfaces will have IPs.
         # The physical trunk interface should NOT have an IP.
-        router = self.addNode('r0', cls=LinuxRouter, ip=None) 
+        yield ('node', 'r0', {'cls': LinuxRouter, 'ip': None})
 
         # Link between switch and router (this will be trunk)
         # Mininet will create s1-eth1 (or s1-trunk) and r0-eth1 (or r0-phys-trunk)
-        self.addLink(s1, router, intfName1='s1-trunk-port', intfName2='r0-phys-trunk')
-
-        vm_configs = [
-            # VLAN 100 VMs
-            {'name': 'q1', 'overlay': '/tmp/qemu_vlan1_overlay.qcow2', 'tap': 'tapv100q1', # Distinct TAP names
-             'mac': '52:54:00:AA:01:10', 'qemu_ip': '127.0.0.1', 'ssh_host_port': 2261,
-             'mgmt_mac_suffix': 'A1', 'app_ip': '10.0.100.10/24', 'exp_intf_name': 'ens4',
-             'default_gw': '10.0.100.1', 'bridge_name': 's1', 'vlan_access_tag': 100,
-             'static_routes': [{'subnet': '10.0.200.0/24', 'via': '10.0.100.1'}]},
-            {'name': 'q2', 'overlay': '/tmp/qemu_vlan2_overlay.qcow2', 'tap': 'tapv100q2',
-             'mac': '52:54:00:AA:01:11', 'qemu_ip': '127.0.0.1', 'ssh_host_port': 2262,
-             'mgmt_mac_suffix': 'A2', 'app_ip': '10.0.100.11/24', 'exp_intf_name': 'ens4',
-             'default_gw': '10.0.100.1', 'bridge_name': 's1', 'vlan_access_tag': 100,
-             'static_routes': [{'subnet': '10.0.200.0/24', 'via': '10.0.100.1'}]},
-            # VLAN 200 VMs
-            {'name': 'q3', 'overlay': '/tmp/qemu_vlan3_overlay.qcow2', 'tap': 'tapv200q3',
-             'mac': '52:54:00:BB:01:10', 'qemu_ip': '127.0.0.1', 'ssh_host_port': 2263,
-             'mgmt_mac_suffix': 'B1', 'app_ip': '10.0.200.10/24', 'exp_intf_name': 'ens4',
-             'default_gw': '10.0.200.1', 'bridge_name': 's1', 'vlan_access_tag': 200,
-             'static_routes': [{'subnet': '10.0.100.0/24', 'via': '10.0.200.1'}]},
-            {'name': 'q4', 'overlay': '/tmp/qemu_vlan4_overlay.qcow2', 'tap': 'tapv200q4',
-             'mac': '52:54:00:BB:01:11', 'qemu_ip': '127.0.0.1', 'ssh_host_port': 2264,
-             'mgmt_mac_suffix': 'B2', 'app_ip': '10.0.200.11/24', 'exp_intf_name': 'ens4',
-             'default_gw': '10.0.200.1', 'bridge_name': 's1', 'vlan_access_tag': 200,
-             'static_routes': [{'subnet': '10.0.100.0/24', 'via': '10.0.200.1'}]}
-        ]
+        yield ('link', 's1', 'r0', {'intfName1': 's1-trunk-port', 'intfName2': 'r0-phys-trunk'})
 
-        for config in vm_configs:
-            host_name = config.pop('name') 
-            host_params = config 
-            
-            q_host = self.addHost(host_name, cls=QemuHost, **host_params)
+        for vm in VM_CONFIGS:
+            yield ('host', vm.name, dict(cls=QemuHost, **vm.host_params()))
 
-            # DO NOT ADD self.addLink(q_host, s1) FOR QEMUHOSTS
+            # DO NOT ADD A ('link', vm.name, 's1') OP FOR QEMUHOSTS
             # Connection is made through TAP in QemuHost.startQemu() using 'bridge_name'
             # and VLAN configuration will be done on the TAP port on OVS.
 
-        # Store VLAN info for runner's use
-        self.vlans = {
-            100: ['q1', 'q2'],
-            200: ['q3', 'q4']
-        }
-        self.trunk_vlans = {100, 200}
+    def build(self, **opts):
+        super().build(**opts)
+        # Store VLAN info for runner's use (derived once from VM_CONFIGS)
+        self.vlans = VLAN_MEMBERS
+        self.trunk_vlans = frozenset(VLAN_MEMBERS)
+
+    def ovs_vlan_batch_cmd(self, bridge_name, trunk_port):
+        """ovs-vsctl arguments (without the 'ovs-vsctl' itself) that, in one transaction, add every VM's TAP
+        to bridge_name as an access port of its VLAN and make trunk_port carry all the VLANs."""
+        args = []
+        for vm in VM_CONFIGS:
+            args += ['--', '--may-exist', 'add-port', bridge_name, vm.tap,
+                     '--', 'set', 'port', vm.tap, f"tag={vm.vlan_access_tag}"]
+        args += ['--', 'set', 'port', trunk_port, f"trunks={','.join(str(vlan) for vlan in sorted(self.trunk_vlans))}"]
+        return args
 
     def get_router_interface(self):
         """Return the router's physical interface name that connects to the switch"""
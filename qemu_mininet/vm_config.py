@@ -0,0 +1,22 @@
+from typing import NamedTuple, Optional
+
+# Kept free of Mininet and qemu_mininet_components imports so topology modules can declare their VMs cheaply
+class VMConfig(NamedTuple):
+    """Immutable description of one QEMU VM of a topology; build() passes it to addHost(cls=QemuHost)."""
+    name: str
+    tap: str
+    mac: str
+    ssh_host_port: int
+    mgmt_mac_suffix: str
+    app_ip: str
+    qemu_ip: str = '127.0.0.1'
+    exp_intf_name: str = 'ens4'
+    default_gw: Optional[str] = None
+    bridge_name: str = 's1'
+    vlan_access_tag: Optional[int] = None
+    static_routes: tuple = ()
+    vcpus: int = 1 # Guest vCPUs; the experimental NIC gets one virtio-net queue pair per vCPU
+
+    def host_params(self):
+        """addHost keyword arguments: every field but the name, leaving out the unset ones (None, no static routes)."""
+        return {key: value for key, value in zip(self._fields[1:], self[1:]) if value is not None and value != ()}
\ No newline at end of file